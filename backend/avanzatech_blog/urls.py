@@ -16,6 +16,7 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from common.views import metrics_view
 
 urlpatterns = [
     path('api/admin/', admin.site.urls),
@@ -23,4 +24,5 @@ urlpatterns = [
     path('api/blog/', include('post.urls')),
     path('api/like/', include('like.urls')),
     path('api/comment/', include('comment.urls')),
+    path('api/metrics/', metrics_view, name='metrics'),
 ]
@@ -1,7 +1,10 @@
+from unittest.mock import patch
 from django.test import TestCase
 from category.models import Category
 from category.tests.factories import CategoryFactory
-from common.constants import AccessCategory
+from common.cache import invalidate_cache
+from common.constants import AccessCategory, CATEGORIES, CacheNamespace
+from common.registry import get_category, get_category_id, get_category_name
 
 
 # Create your tests here.
@@ -33,4 +36,71 @@ class CategoryModelTests(TestCase):
         self.assertEqual(categories[0].name, AccessCategory.PUBLIC)
         self.assertEqual(categories[1].name, AccessCategory.AUTHENTICATED)
         self.assertEqual(categories[2].name, AccessCategory.TEAM)
-        self.assertEqual(categories[3].name, AccessCategory.AUTHOR)
\ No newline at end of file
+        self.assertEqual(categories[3].name, AccessCategory.AUTHOR)
+    def test_the_registry_is_reloaded_when_a_category_is_renamed(self):
+        # Arrange
+        category = CategoryFactory(name='Test Category')
+        get_category_name(category.id)
+        # Act
+        category.name = 'Renamed Category'
+        category.save()
+        # Assert
+        self.assertEqual(get_category_name(category.id), 'Renamed Category')
+        self.assertEqual(get_category_id('Renamed Category'), category.id)
+        self.assertIsNone(get_category_id('Test Category'))
+
+    def test_the_registry_resolves_categories_without_querying_the_database(self):
+        # Arrange
+        categories = CategoryFactory.create_batch()
+        get_category_name(categories[0].id)
+        # Act
+        with self.assertNumQueries(0):
+            names = [get_category_name(category.id) for category in categories]
+        # Assert
+        self.assertEqual(names, list(CATEGORIES.keys()))
+
+    def test_the_registry_is_reloaded_at_most_once_for_unknown_categories(self):
+        # Arrange
+        categories = CategoryFactory.create_batch()
+        unknown_ids = [categories[-1].id + offset for offset in range(1, 101)]
+        # Act
+        with self.assertNumQueries(1):
+            found_categories = [get_category(category_id) for category_id in unknown_ids]
+        # Assert
+        self.assertEqual(found_categories, [None] * len(unknown_ids))
+
+    def test_a_category_created_by_another_process_is_found_after_the_reload_interval(self):
+        # Arrange
+        get_category_name(CategoryFactory().id)
+        # Created without the save signal, as another process would
+        category = Category.objects.bulk_create([Category(name='Other Process Category')])[0]
+        # Act
+        with patch('common.registry.REGISTRY_MISS_RELOAD_INTERVAL', 0):
+            found_category = get_category(category.id)
+        # Assert
+        self.assertEqual(found_category, category)
+
+    def test_a_category_renamed_by_another_process_is_reloaded_after_the_version_check_interval(self):
+        # Arrange
+        category = CategoryFactory(name='Test Category')
+        get_category_name(category.id)
+        # Renamed without the save signal, the other process bumps the shared version
+        Category.objects.filter(id=category.id).update(name='Renamed Category')
+        invalidate_cache(CacheNamespace.REGISTRY)
+        # Act
+        name_before_check = get_category_name(category.id)
+        with patch('common.registry.REGISTRY_VERSION_CHECK_INTERVAL', 0):
+            name_after_check = get_category_name(category.id)
+        # Assert
+        self.assertEqual(name_before_check, 'Test Category')
+        self.assertEqual(name_after_check, 'Renamed Category')
+
+    def test_the_registry_is_not_reloaded_while_the_shared_version_is_unchanged(self):
+        # Arrange
+        category = CategoryFactory()
+        get_category_name(category.id)
+        # Act
+        with patch('common.registry.REGISTRY_VERSION_CHECK_INTERVAL', 0), self.assertNumQueries(0):
+            name = get_category_name(category.id)
+        # Assert
+        self.assertEqual(name, category.name)
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-17 12:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comment', '0006_alter_comment_options'),
+        ('post', '0012_post_post_created_at_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['post', 'created_at'], name='comment_active_post_idx'),
+        ),
+    ]
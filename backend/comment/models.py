@@ -1,11 +1,15 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from common.models import BaseModel
-from common.constants import STATUS, STATUS_CHOICES
+from common.models import PostCounterModel
+from common.cache import invalidate_cache
+from common.constants import STATUS, STATUS_CHOICES, CacheNamespace
 from user.models import CustomUser
 from post.models import Post
 
-class Comment(BaseModel):
+class Comment(PostCounterModel):
+
+    post_counter_field = 'comment_count'
+    cache_namespace = CacheNamespace.COMMENT
 
     content = models.TextField(blank=False)
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)    
@@ -24,9 +28,19 @@ class Comment(BaseModel):
             raise ValueError(_("Invalid Content"))
 
         super().save(*args, **kwargs)
+        invalidate_cache(CacheNamespace.COMMENT)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_cache(CacheNamespace.COMMENT)
+        return result
 
     def __str__(self):
         return f"Comment {self.id} by {self.user.email} on {self.post.title}"
 
     class Meta:
-        ordering = ["created_at"]
\ No newline at end of file
+        ordering = ["created_at"]
+        indexes = [
+            # Active comments of a post in the list order
+            models.Index(fields=['post', 'created_at'], condition=models.Q(is_active=True), name='comment_active_post_idx'),
+        ]
\ No newline at end of file
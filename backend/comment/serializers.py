@@ -2,12 +2,15 @@ from rest_framework import serializers
 from user.serializers import CustomUserSerializer
 from comment.models import Comment
 from common.validators import validate_user
+from post.models import Post
 
 class CommentCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ['id','content','user','post','is_active','created_at']
         read_only_fields = ('id','is_active','created_at')
+        # The post author is needed by check_permissions
+        extra_kwargs = {'post': {'queryset': Post.objects.select_related('user')}}
 
     def validate_user(self, user):
         return validate_user(user, serializer_self=self)
@@ -107,4 +107,32 @@ class CommentModelTests(TestCase):
 
                 
 
-            
\ No newline at end of file
+            
+
+    def test_create_and_delete_comments_update_the_comment_count_of_the_post(self):
+        # Arrange
+        post = PostFactory()
+        comments = CommentFactory.create_batch(3, post=post)
+        inactive_comment = CommentFactory(post=post, is_active=False)
+        # Act
+        comments[0].is_active = False
+        comments[0].save()
+        comments[1].delete()
+        inactive_comment.delete()
+        post_db = Post.objects.get(id=post.id)
+        # Assert
+        self.assertEqual(post_db.comment_count, 1)
+
+
+    def test_a_comment_deactivated_by_another_request_is_not_counted_twice(self):
+        # Arrange
+        post = PostFactory()
+        comment = CommentFactory(post=post)
+        stale_comment = Comment.objects.get(id=comment.id)
+        comment.is_active = False
+        comment.save()
+        # Act
+        stale_comment.delete()
+        post_db = Post.objects.get(id=post.id)
+        # Assert
+        self.assertEqual(post_db.comment_count, 0)
@@ -10,7 +10,10 @@ from comment.models import Comment
 from comment.tests.factories import CommentFactory
 from permission.tests.factories import PermissionFactory
 from category.tests.factories import CategoryFactory
-from common.constants import AccessCategory, AccessPermission, Status
+from common.constants import AccessCategory, AccessPermission, Status, CONTENT_MOCK, DEFAULT_ACCESS_CONTROL
+from common.utils import get_access_bits
+from common.tests.mixins import NPlusOneQueryTestMixin, QueryPlanTestMixin
+from django.core.cache import cache
 
 class CommentCreateViewTests(APITestCase):
     def setUp(self):
@@ -720,6 +723,23 @@ class CommentListViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(count, expected_comments)
 
+    def test_comments_are_listed_by_creation_order_with_cursor_pagination(self):
+        # Arrange
+        post = PostFactory()
+        PostCategoryPermissionFactory.create(post=post, category_permission=self.factory_category_permission)
+        comments = CommentFactory.create_batch(3, post=post)
+        expected_order = [comment.id for comment in comments]
+        # Act
+        response = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 2})
+        first_page = [result['id'] for result in response.data.get('results')]
+        response = self.client.get(response.data.get('next'))
+        second_page = [result['id'] for result in response.data.get('results')]
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(first_page + second_page, expected_order)
+        self.assertIsNone(response.data.get('next'))
+
+
 class CommentDeleteViewTests(APITestCase):
     def setUp(self):
         self.team = TeamFactory()
@@ -801,3 +821,106 @@ class CommentDeleteViewTests(APITestCase):
         self.assertEqual(comment_db, expected_comments)
         self.assertTrue(comment_db_is_active)
 
+
+class CommentQueryPlanViewTests(QueryPlanTestMixin, APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.team = TeamFactory()
+        self.user = CustomUserFactory(team=self.team)
+        self.client.force_authenticate(self.user)
+        self.url = reverse('comment-list-create')
+        self.factory_category_permission = {
+            AccessCategory.PUBLIC: AccessPermission.READ,
+            AccessCategory.AUTHENTICATED: AccessPermission.READ,
+            AccessCategory.TEAM: AccessPermission.EDIT,
+            AccessCategory.AUTHOR: AccessPermission.EDIT
+        }
+        access = 0
+        for category, permission in self.factory_category_permission.items():
+            access |= get_access_bits(category, permission)
+        # Enough rows for the planner to prefer reading the page from an index over sorting
+        author = CustomUserFactory()
+        self.posts = Post.objects.bulk_create([
+            Post(title=f"Post {index}", content=CONTENT_MOCK, user=author, access=access) for index in range(2)
+        ])
+        Comment.objects.bulk_create([
+            Comment(post=post, user=author, content=CONTENT_MOCK, is_active=index % 2 == 0)
+            for post in self.posts for index in range(1000)
+        ])
+
+    def test_comments_of_a_post_are_read_from_the_active_post_index(self):
+        # Act
+        queries = self.get_request_queries(self.url, {'post': self.posts[0].id})
+        # Assert
+        page_query = self.get_query_on(queries, 'comment_comment', 'LIMIT')
+        self.assertQueryUsesIndex(page_query, 'comment_active_post_idx')
+
+class CommentNPlusOneQueryViewTests(NPlusOneQueryTestMixin, APITestCase):
+
+    def setUp(self):
+        self.user = CustomUserFactory()
+        CategoryFactory.create_batch()
+        PermissionFactory.create_batch()
+        self.post = PostFactory()
+        PostCategoryPermissionFactory.create(post=self.post, category_permission=DEFAULT_ACCESS_CONTROL)
+        # Every comment has a different author on a different team
+        CommentFactory.create_batch(12, post=self.post)
+        self.url = reverse('comment-list-create')
+
+    def test_unauthenticated_user_list_does_not_query_per_comment(self):
+        # Act
+        # Assert
+        self.assertNoNPlusOneQueries(self.url, {'post': self.post.id})
+
+    def test_authenticated_user_list_does_not_query_per_comment(self):
+        # Arrange
+        self.client.force_authenticate(self.user)
+        # Act
+        # Assert
+        self.assertNoNPlusOneQueries(self.url, {'post': self.post.id})
+        self.assertNoNPlusOneQueries(self.url, {'post': self.post.id, 'pagination': 'cursor'})
+
+
+class CommentBulkDeleteViewTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUserFactory()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('comment-bulk-delete')
+        self.post = PostFactory()
+        CommentFactory.create_batch(3, user=self.user, post=self.post)
+
+    def test_bulk_delete_deactivates_the_comments_of_the_user_in_the_post(self):
+        # Arrange
+        other_comment = CommentFactory(post=self.post)
+        # Act
+        response = self.client.post(self.url, {'user': self.user.id, 'post': self.post.id}, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'deactivated': 3, 'remaining': 0})
+        self.assertFalse(Comment.objects.filter(user=self.user, is_active=True).exists())
+        self.assertTrue(Comment.objects.get(id=other_comment.id).is_active)
+        self.assertEqual(Post.objects.get(id=self.post.id).comment_count, 1)
+
+    def test_bulk_delete_of_another_user_is_rejected_for_non_admin_users(self):
+        # Arrange
+        other_user = CustomUserFactory()
+        # Act
+        response = self.client.post(self.url, {'user': other_user.id}, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Post.objects.get(id=self.post.id).comment_count, 3)
+
+    def test_bulk_delete_of_a_user_by_an_admin_deactivates_its_comments_in_every_post(self):
+        # Arrange
+        admin = CustomUserFactory(is_staff=True)
+        self.client.force_authenticate(admin)
+        other_post = PostFactory()
+        CommentFactory(user=self.user, post=other_post)
+        # Act
+        response = self.client.post(self.url, {'user': self.user.id}, format='json')
+        # Assert
+        self.assertEqual(response.data, {'deactivated': 4, 'remaining': 0})
+        self.assertEqual(sum(Post.objects.values_list('comment_count', flat=True)), 0)
@@ -3,5 +3,6 @@ from . import views
 
 urlpatterns = [
     path('', views.ListCreateCommentView.as_view(), name="comment-list-create"),
+    path('bulk-delete/', views.BulkDeleteCommentView.as_view(), name="comment-bulk-delete"),
     path('<int:pk>/', views.DeleteCommentView.as_view(), name="comment-delete"),
 ]
@@ -1,21 +1,26 @@
-from rest_framework.generics import ListCreateAPIView, DestroyAPIView
+from rest_framework.generics import GenericAPIView, ListCreateAPIView, DestroyAPIView
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, SAFE_METHODS
 from django_filters import rest_framework as filters
 from comment.serializers import CommentCreateSerializer, CommentListSerializer, CommentDeleteSerializer
 from comment.models import Comment
-from common.mixins import DestroyMixin, PerformCreateMixin, GetQuerysetByPermissionsMixin
-from common.paginator import TenResultsSetPagination
+from common.constants import CacheNamespace
+from common.serializers import BulkDeactivateSerializer
+from common.mixins import BulkDeactivateMixin, CursorPaginationMixin, DestroyMixin, PerformCreateMixin, GetQuerysetByPermissionsMixin
+from common.paginator import TenResultsSetCachedCountPagination, TenResultsSetCursorPagination
 
 
-class ListCreateCommentView(PerformCreateMixin, ListCreateAPIView, GetQuerysetByPermissionsMixin):
+class ListCreateCommentView(PerformCreateMixin, CursorPaginationMixin, ListCreateAPIView, GetQuerysetByPermissionsMixin):
 
     permission_classes = [IsAuthenticatedOrReadOnly]
-    pagination_class = TenResultsSetPagination
+    pagination_class = TenResultsSetCachedCountPagination
+    cursor_pagination_class = TenResultsSetCursorPagination
+    cache_namespaces = (CacheNamespace.POST, CacheNamespace.COMMENT)
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_fields = ('post', 'user')
 
     def get_queryset(self): 
-        return self.get_queryset_by_permissions(Comment, is_post_related=True)
+        # The list serializer nests the user with its team
+        return self.get_queryset_by_permissions(Comment, is_post_related=True).select_related('user__team')
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
@@ -28,6 +33,8 @@ class DeleteCommentView(DestroyMixin, DestroyAPIView):
     serializer_class = CommentDeleteSerializer
     queryset = Comment.objects.all()
 
-    
-
+class BulkDeleteCommentView(BulkDeactivateMixin, GenericAPIView):
 
+    permission_classes = [IsAuthenticated]
+    serializer_class = BulkDeactivateSerializer
+    model = Comment
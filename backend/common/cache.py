@@ -0,0 +1,26 @@
+import time
+from django.core.cache import cache
+
+
+def _get_version_key(namespace):
+    return f"cache-version:{namespace}"
+
+def get_cache_version(namespace):
+    # Current version of a namespace, every key built with it expires when the namespace is invalidated
+    return cache.get_or_set(_get_version_key(namespace), time.time_ns, timeout=None)
+
+def get_cache_versions(namespaces):
+    return ":".join(str(get_cache_version(namespace)) for namespace in namespaces)
+
+def invalidate_cache(*namespaces):
+    # A new version makes the previous keys of the namespace unreachable until they expire
+    for namespace in namespaces:
+        cache.set(_get_version_key(namespace), time.time_ns(), timeout=None)
+
+def get_visibility_class(user):
+    # Users that see exactly the same rows share a visibility class
+    if user.is_anonymous:
+        return "anonymous"
+    if user.is_staff:
+        return "staff"
+    return f"user:{user.id}:team:{user.team_id}"
@@ -35,6 +35,30 @@ DEFAULT_ACCESS_CONTROL = {
     AccessCategory.AUTHOR: AccessPermission.EDIT
 }
 
+class AccessBit:
+    """
+    Constants for the bits stored in the post access bitmap.
+    """
+    READ = 0b01
+    EDIT = 0b10
+
+# Each category owns two bits of the post access bitmap, starting at this offset
+ACCESS_CATEGORY_OFFSET = {
+    AccessCategory.PUBLIC: 0,
+    AccessCategory.AUTHENTICATED: 2,
+    AccessCategory.TEAM: 4,
+    AccessCategory.AUTHOR: 6,
+}
+
+ACCESS_ALL = sum((AccessBit.READ | AccessBit.EDIT) << offset for offset in ACCESS_CATEGORY_OFFSET.values())
+
+# Bits granted by each permission inside its category slot
+ACCESS_PERMISSION_BITS = {
+    AccessPermission.READ: AccessBit.READ,
+    AccessPermission.EDIT: AccessBit.READ | AccessBit.EDIT,
+    AccessPermission.NO_PERMISSION: 0,
+}
+
 class Status:
     """
     Constants for different status values.
@@ -49,7 +73,34 @@ STATUS = {
 
 STATUS_CHOICES = [(status, description) for (status, description) in STATUS.items()]
 
+class CacheNamespace:
+    """
+    Constants for the namespaces invalidated on writes.
+    """
+    POST = 'post'
+    LIKE = 'like'
+    COMMENT = 'comment'
+    TEAM = 'team'
+    USER = 'user'
+    REGISTRY = 'registry'
+
+COUNT_CACHE_TIMEOUT = 60  # seconds
+ANONYMOUS_RESPONSE_CACHE_TIMEOUT = 60  # seconds
+TEAM_FEED_CACHE_TIMEOUT = 300  # seconds
+TEAM_FEED_CACHE_MAX_POSTS = 10000  # posts
+USER_CACHE_TIMEOUT = 300  # seconds
+# Fields of the session user kept in the cache, the password hash is never cached
+USER_CACHE_FIELDS = ('id', 'email', 'first_name', 'last_name', 'is_active', 'is_staff', 'is_superuser', 'team_id')
+REGISTRY_MISS_RELOAD_INTERVAL = 5  # seconds
+REGISTRY_VERSION_CHECK_INTERVAL = 5  # seconds
+ESTIMATED_COUNT_THRESHOLD = 10000  # rows
+
 EXCERPT_LENGTH = 200
+BULK_CREATE_MAX_POSTS = 1000  # posts per request
+BULK_LIKE_MAX_POSTS = 1000  # posts per request
+BULK_DEACTIVATE_BATCH_SIZE = 1000  # rows per update
+BULK_DEACTIVATE_MAX_BATCHES = 5  # batches per request
+EXPORT_CHUNK_SIZE = 2000  # rows per fetch of the export cursor
 WORDS_MOCK_TEXT = 100
 
 CONTENT_MOCK = "If you really want to hear about it, the first thing you'll probably want to know is where I was born, and what my lousy childhood was like, and how my parents were occupied and all before they had me, and all that David Copperfield kind of crap, but I don't feel like going into it."
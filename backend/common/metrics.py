@@ -0,0 +1,94 @@
+import os
+import time
+from prometheus_client import CollectorRegistry, Histogram, disable_created_metrics, generate_latest, multiprocess
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # seconds
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)  # queries
+CONNECTION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)  # seconds
+
+METRICS = {
+    'http_request_duration_seconds': ('Duration of the requests', DURATION_BUCKETS, ('url_name', 'method')),
+    'http_request_db_duration_seconds': (
+        'Time spent in database queries per request', DURATION_BUCKETS, ('url_name', 'method')
+    ),
+    'http_request_db_queries': ('Database queries per request', QUERY_BUCKETS, ('url_name', 'method')),
+    'db_connection_acquire_seconds': (
+        'Time spent opening a database connection or waiting for one from the pool', CONNECTION_BUCKETS, ('mode',)
+    ),
+}
+
+# Histograms of this process by metric. With PROMETHEUS_MULTIPROC_DIR set, prometheus_client stores
+# their values in files of that directory, shared by every worker of the server
+_registry = None
+_histograms = {}
+
+# The creation time series are not kept in multiprocess mode, they are left out in both modes
+disable_created_metrics()
+
+
+class QueryRecorder:
+    """
+    Execute wrapper that records the queries executed while it is installed.
+
+    Usage:
+        with connection.execute_wrapper(recorder):
+            ...
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+        self.slowest_duration = 0.0
+        self.slowest_sql = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.duration += duration
+            if duration > self.slowest_duration:
+                self.slowest_duration = duration
+                self.slowest_sql = sql
+
+
+def _create_histograms():
+    global _registry
+    _registry = CollectorRegistry()
+    for metric, (description, buckets, labels) in METRICS.items():
+        _histograms[metric] = Histogram(metric, description, labels, buckets=buckets, registry=_registry)
+
+def record_request(url_name, method, duration, queries, db_duration):
+    _histograms['http_request_duration_seconds'].labels(url_name, method).observe(duration)
+    _histograms['http_request_db_duration_seconds'].labels(url_name, method).observe(db_duration)
+    _histograms['http_request_db_queries'].labels(url_name, method).observe(queries)
+
+def record_connection(mode, duration):
+    # The mode is 'pool' when the connection comes from the pool, 'direct' when it is opened
+    _histograms['db_connection_acquire_seconds'].labels(mode).observe(duration)
+
+def reset_metrics():
+    _create_histograms()
+
+def render_metrics():
+    """
+    Render the histograms in the Prometheus text format.
+
+    With PROMETHEUS_MULTIPROC_DIR set, as the gunicorn configuration does, the histograms of every
+    worker process are read from that directory and added up, so a scrape covers the whole
+    server whichever worker answers it. Otherwise the histograms of this process are rendered.
+
+    Returns:
+        The metrics as text.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = _registry
+    return generate_latest(registry).decode()
+
+
+_create_histograms()
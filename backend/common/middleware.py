@@ -0,0 +1,53 @@
+import logging
+import time
+from django.conf import settings
+from django.db import connection
+from common.metrics import QueryRecorder, record_request
+
+logger = logging.getLogger(__name__)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    A middleware for measuring the database work of every request.
+
+    It records the query count, the total database time and the slowest statement of the request
+    with an execute wrapper, exposes them in the `Server-Timing` header and aggregates them in
+    histograms by url name. Statements slower than `SLOW_QUERY_THRESHOLD_MS` are logged.
+
+    The body of streaming responses is consumed after the middleware returns, so its queries are not measured.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        url_name = self.get_url_name(request)
+        record_request(url_name, request.method, duration, recorder.queries, recorder.duration)
+        if settings.SERVER_TIMING_ENABLED:
+            response['Server-Timing'] = self.get_server_timing(duration, recorder)
+        if recorder.slowest_sql is not None and recorder.slowest_duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            logger.warning(
+                "Slow query in %s %s (%.1f ms): %s",
+                request.method, url_name, recorder.slowest_duration * 1000, recorder.slowest_sql,
+            )
+        return response
+
+    def get_url_name(self, request):
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is None or resolver_match.view_name is None:
+            return 'unresolved'
+        return resolver_match.view_name
+
+    def get_server_timing(self, duration, recorder):
+        return (
+            f'db;dur={recorder.duration * 1000:.2f};desc="{recorder.queries} queries", '
+            f'db-slowest;dur={recorder.slowest_duration * 1000:.2f}, '
+            f'total;dur={duration * 1000:.2f}'
+        )
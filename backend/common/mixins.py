@@ -1,10 +1,22 @@
+from hashlib import md5
+from itertools import islice
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework import status
 from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
 from rest_framework.generics import get_object_or_404
 from django.db.models.query import QuerySet
-from django.db.models import Q
+from django.db.models import F, Q
+from django.db.models.lookups import GreaterThan
 from django.contrib.auth.models import AnonymousUser
 from common.validators import check_permissions
-from common.constants import AccessCategory, AccessPermission
+from common.cache import get_cache_versions
+from common.constants import (
+    AccessCategory, AccessBit, ANONYMOUS_RESPONSE_CACHE_TIMEOUT, BULK_DEACTIVATE_BATCH_SIZE,
+    BULK_DEACTIVATE_MAX_BATCHES,
+)
+from common.utils import get_access_mask
 
 class PerformCreateMixin:
     """
@@ -49,7 +61,8 @@ class DestroyMixin:
             None
         """
         instance.is_active = False
-        instance.save()
+        # Only the soft delete columns are written
+        instance.save(update_fields=['is_active', 'last_modified'])
 
     def get_queryset(self):
         """
@@ -74,6 +87,121 @@ class DestroyMixin:
         return queryset.filter(user=self.request.user)
 
 
+class BulkDeactivateMixin:
+    """
+    A mixin for deactivating the rows of a post counter model in bulk.
+
+    This mixin provides the `post` method, which deactivates the active rows of a user, of a post,
+    or of a user in a post with set-based updates, see `PostCounterModel.bulk_deactivate`.
+    Admin users can deactivate the rows of any user, other users only their own ones.
+    A request runs at most `max_batches` batches and reports the rows left, so the client repeats
+    it until none remain and a single request never holds a worker for the whole deactivation.
+    """
+    model = None
+    batch_size = BULK_DEACTIVATE_BATCH_SIZE
+    max_batches = BULK_DEACTIVATE_MAX_BATCHES
+
+    def post(self, request):
+        """
+        Deactivate the rows selected by the payload.
+
+        Args:
+            request: The request with the `user` and `post` of the rows.
+
+        Returns:
+            A response with the number of deactivated rows and of the rows left to deactivate.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        filters = {f"{field}_id": instance.id for field, instance in serializer.validated_data.items()}
+        if not request.user.is_staff:
+            filters['user_id'] = request.user.id
+        batches = self.model.bulk_deactivate(batch_size=self.batch_size, **filters)
+        deactivated = sum(islice(batches, self.max_batches))
+        # Only a request that ran every batch of full rows may have left rows behind
+        remaining = 0
+        if deactivated == self.batch_size * self.max_batches:
+            remaining = self.model.objects.filter(is_active=True, **filters).count()
+        return Response({'deactivated': deactivated, 'remaining': remaining}, status=status.HTTP_200_OK)
+
+
+class CursorPaginationMixin:
+    """
+    A mixin for opting in to cursor pagination.
+
+    When the request sends `pagination=cursor`, the view paginates with `cursor_pagination_class`
+    instead of `pagination_class`, so clients can migrate from page numbers incrementally.
+    """
+    cursor_pagination_class = None
+    pagination_query_param = 'pagination'
+    cursor_pagination_value = 'cursor'
+
+    @property
+    def paginator(self):
+        """
+        The paginator instance associated with the view, chosen by the pagination query parameter.
+
+        Returns:
+            The paginator instance, or None.
+        """
+        if not hasattr(self, '_paginator') and self.cursor_pagination_class is not None:
+            if self.request.query_params.get(self.pagination_query_param) == self.cursor_pagination_value:
+                self._paginator = self.cursor_pagination_class()
+        return super().paginator
+
+
+class AnonymousResponseCacheMixin:
+    """
+    A mixin for caching the rendered GET responses served to anonymous users.
+
+    Every anonymous user sees the same rows, so the response is cached by path and query string.
+    The key includes the versions of the view `cache_namespaces`, so writes invalidate it. The
+    headers set by the view, such as `Vary` and `Allow`, are cached and replayed with the content.
+    """
+    anonymous_response_cache_timeout = ANONYMOUS_RESPONSE_CACHE_TIMEOUT
+
+    def get(self, request, *args, **kwargs):
+        """
+        Serve the cached response to anonymous users, or render and cache it.
+
+        Returns:
+            The response for the GET request.
+        """
+        if not request.user.is_anonymous:
+            return super().get(request, *args, **kwargs)
+
+        cache_key = self.get_anonymous_response_cache_key(request)
+        cached_response = cache.get(cache_key)
+        if cached_response is not None:
+            content, headers = cached_response
+            return HttpResponse(content, headers=headers)
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response.add_post_render_callback(
+                lambda rendered: cache.set(
+                    cache_key,
+                    (rendered.content, dict(rendered.items())),
+                    self.anonymous_response_cache_timeout,
+                )
+            )
+        return response
+
+    def get_anonymous_response_cache_key(self, request):
+        """
+        Get the cache key of an anonymous response.
+
+        Args:
+            request: The request being served.
+
+        Returns:
+            The cache key for the path and query string of the request.
+        """
+        path_digest = md5(request.get_full_path().encode()).hexdigest()
+        versions = get_cache_versions(getattr(self, 'cache_namespaces', ()))
+        return f"anonymous-response:{versions}:{path_digest}"
+
+
 class GetQuerysetByPermissionsMixin:
     """
     A mixin for getting the queryset based on user permissions.
@@ -82,20 +210,21 @@ class GetQuerysetByPermissionsMixin:
     It also provides helper methods for filtering the queryset based on different conditions.
     """
 
-    def get_queryset_by_permissions(self, model_class, is_post_related=False):
+    def get_queryset_by_permissions(self, model_class, is_post_related=False, read_only=None):
         """
         Get the queryset based on user permissions.
 
         Args:
             model_class: The model class for which the queryset is to be obtained.
             is_post_related: A boolean indicating whether the model is related to a post.
+            read_only: Whether read access is enough, by default only for safe methods.
 
         Returns:
             The filtered queryset based on user permissions.
         """
         # Set the queryset, the read_only status, and the relationship with post model
         self.queryset = model_class.objects.all()
-        self.read_only = self.request.method in SAFE_METHODS
+        self.read_only = self.request.method in SAFE_METHODS if read_only is None else read_only
         self.is_post_related = is_post_related
         # User is Admin
         if self.request.user.is_staff:
@@ -118,108 +247,80 @@ class GetQuerysetByPermissionsMixin:
         Returns:
             The filtered queryset for an anonymous user.
         """
-        anonymous_conditions = {
-            f"{self.post_field_name}__category__name": AccessCategory.PUBLIC,
-        }
-        # Set conditions by http method and post relationship
-        self.__set_conditions_by_http_method_and_post_relationship(anonymous_conditions)
-
-        return self.queryset.filter(**anonymous_conditions)
+        anonymous_conditions = self.__get_access_condition([AccessCategory.PUBLIC])
+        return self.queryset.filter(anonymous_conditions)
 
     def _get_queryset_for_authenticated_user(self):
         """
         Get the queryset for an authenticated user.
 
+        The conditions of every group of posts are combined in a single filter over the
+        post access bitmap, so no joins with the permission tables nor DISTINCT are needed.
+
         Returns:
             The filtered queryset for an authenticated user.
         """
         # Public and Authenticated Posts
-        non_owner_different_team_queryset = self._get_queryset_for_non_owner_different_team_posts()
+        non_owner_different_team_conditions = self._get_conditions_for_non_owner_different_team_posts()
         # Same Team Posts
-        non_owner_same_team_queryset = self._get_queryset_for_non_owner_same_team_posts()
+        non_owner_same_team_conditions = self._get_conditions_for_non_owner_same_team_posts()
         # Owner Posts
-        owner_queryset = self._get_queryset_for_owner_post()
-        # Combine the querysets
-        self.queryset = (owner_queryset | non_owner_same_team_queryset | non_owner_different_team_queryset)
-        return self.queryset.distinct()
+        owner_conditions = self._get_conditions_for_owner_post()
+        # Combine the conditions
+        self.queryset = self.queryset.filter(owner_conditions | non_owner_same_team_conditions | non_owner_different_team_conditions)
+        return self.queryset
 
-    def _get_queryset_for_non_owner_different_team_posts(self):
+    def _get_conditions_for_non_owner_different_team_posts(self):
         """
-        Get the queryset for non-owner different team posts.
+        Get the conditions for non-owner different team posts.
 
         Returns:
-            The filtered queryset for non-owner different team posts.
-        """
-        nodt_conditions = {
-            f"{self.post_field_name}__category__name__in": [AccessCategory.PUBLIC, AccessCategory.AUTHENTICATED]
-        }
-        # Set conditions by http method and post relationship
-        self.__set_conditions_by_http_method_and_post_relationship(nodt_conditions)
-        # Filter by conditions
-        nodt_queryset = self.queryset.filter(**nodt_conditions)
+            The Q object for non-owner different team posts.
+        """
+        nodt_conditions = self.__get_access_condition([AccessCategory.PUBLIC, AccessCategory.AUTHENTICATED])
         # Exclude the user
-        nodt_queryset = nodt_queryset.exclude(**{
-            f"{self.user_field_name}": self.request.user
-        })
+        nodt_conditions &= ~Q(**{f"{self.user_field_name}": self.request.user.id})
         # Exclude the team
-        nodt_queryset = nodt_queryset.exclude(**{
-            f"{self.team_field_name}": self.request.user.team
-        })
-        return nodt_queryset
+        nodt_conditions &= ~Q(**{f"{self.team_field_name}": self.request.user.team_id})
+        return nodt_conditions
 
-    def _get_queryset_for_non_owner_same_team_posts(self):
+    def _get_conditions_for_non_owner_same_team_posts(self):
         """
-        Get the queryset for non-owner same team posts.
+        Get the conditions for non-owner same team posts.
 
         Returns:
-            The filtered queryset for non-owner same team posts.
-        """
-        # Basic conditions
-        nost_conditions = {
-            f"{self.post_field_name}__category__name": AccessCategory.TEAM,
-            f"{self.team_field_name}": self.request.user.team
-        }
-        # Set conditions by HTTP Method and post relationship
-        self.__set_conditions_by_http_method_and_post_relationship(nost_conditions)
-        # Filter by conditions
-        nost_queryset = self.queryset.filter(**nost_conditions)
+            The Q object for non-owner same team posts.
+        """
+        nost_conditions = self.__get_access_condition([AccessCategory.TEAM])
+        nost_conditions &= Q(**{f"{self.team_field_name}": self.request.user.team_id})
         # Exclude the user
-        nost_queryset = nost_queryset.exclude(**{
-            f"{self.user_field_name}": self.request.user
-        })
-        return nost_queryset
+        nost_conditions &= ~Q(**{f"{self.user_field_name}": self.request.user.id})
+        return nost_conditions
 
-    def _get_queryset_for_owner_post(self):
+    def _get_conditions_for_owner_post(self):
         """
-        Get the queryset for owner posts.
+        Get the conditions for owner posts.
 
         Returns:
-            The filtered queryset for owner posts.
+            The Q object for owner posts.
         """
-        # Basic conditions
-        owner_conditions = {
-            f"{self.post_field_name}__category__name": AccessCategory.AUTHOR,
-            f"{self.user_field_name}": self.request.user
-        }
-        # Set conditions by HTTP Method and post relationship
-        self.__set_conditions_by_http_method_and_post_relationship(owner_conditions)
-        # Filter by conditions
-        return self.queryset.filter(**owner_conditions)
+        owner_conditions = self.__get_access_condition([AccessCategory.AUTHOR])
+        owner_conditions &= Q(**{f"{self.user_field_name}": self.request.user.id})
+        return owner_conditions
 
-    def __set_conditions_by_http_method_and_post_relationship(self, conditions):
+    def __get_access_condition(self, categories):
         """
-        Set the conditions based on the HTTP method and the relationship with post model.
+        Get the condition over the post access bitmap based on the HTTP method and the relationship with post model.
 
         Args:
-            conditions: The conditions dictionary to be updated.
+            categories: The categories that grant access to the post.
 
         Returns:
-            None
+            A Q object matching posts with the required access bit in any of the categories.
         """
-        if self.read_only or self.is_post_related:
-            conditions[f"{self.post_field_name}__permission__name__in"] = [AccessPermission.READ, AccessPermission.EDIT]
-        else:
-            conditions[f"{self.post_field_name}__permission__name"] = AccessPermission.EDIT
+        access_bit = AccessBit.READ if self.read_only or self.is_post_related else AccessBit.EDIT
+        mask = get_access_mask(categories, access_bit)
+        return Q(GreaterThan(F(self.access_field_name).bitand(mask), 0))
 
     def __set_search_fields_by_model_relationship(self, is_post_related):
         """
@@ -233,9 +334,7 @@ class GetQuerysetByPermissionsMixin:
         """
         self.user_field_name = "post__user" if is_post_related else "user"
         self.team_field_name = "post__user__team" if is_post_related else "user__team"
-        self.post_field_name = "post_category_permission"
+        self.access_field_name = "access"
         if is_post_related:
-            self.post_field_name = "post__" + self.post_field_name
+            self.access_field_name = "post__" + self.access_field_name
             self.queryset = self.queryset.filter(is_active=True)
-
-
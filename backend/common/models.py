@@ -1,8 +1,111 @@
-from django.db import models
+from collections import defaultdict
+from django.db import models, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from common.cache import invalidate_cache
+from common.constants import BULK_DEACTIVATE_BATCH_SIZE
 
 class BaseModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     last_modified = models.DateTimeField(auto_now=True)
 
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+class PostCounterModel(BaseModel):
+    """
+    Base model for rows that are counted in a Post counter while they are active.
+
+    Subclasses define a `post` foreign key, an `is_active` field and the name of the
+    counter in `post_counter_field`. The counter is updated in the same transaction
+    as the row, only when the active row is added to or removed from a post. The change
+    is computed from the stored row, locked for the transaction, so concurrent saves of
+    stale instances of the same row are counted once.
+    """
+    post_counter_field = None
+    # Cache namespace invalidated by the bulk deactivations
+    cache_namespace = None
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        counted_fields = {'post', 'post_id', 'is_active'}
+        if update_fields is not None and not counted_fields.intersection(update_fields):
+            # The saved columns do not change what is counted
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            previous_post_id, previous_is_active = (None, False) if self._state.adding else self._lock_counted_state()
+            super().save(*args, **kwargs)
+            self._update_post_counters(previous_post_id, previous_is_active, self.post_id, self.is_active)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            previous_post_id, previous_is_active = self._lock_counted_state()
+            result = super().delete(*args, **kwargs)
+            self._update_post_counters(previous_post_id, previous_is_active, None, False)
+        return result
+
+    @classmethod
+    def bulk_deactivate(cls, batch_size=BULK_DEACTIVATE_BATCH_SIZE, **filters):
+        """
+        Deactivate the active rows matching the filters with set-based updates, batch by batch.
+
+        Every batch locks its rows, deactivates them with one `UPDATE` and decrements the counters
+        of their posts with another, in a single transaction. The cache namespace is invalidated
+        once per batch.
+
+        Args:
+            batch_size: The rows deactivated per batch.
+            **filters: The lookups selecting the rows, such as `user_id` or `post_id`.
+
+        Yields:
+            The number of rows deactivated by every batch.
+        """
+        post_model = cls._meta.get_field('post').related_model
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    cls.objects.filter(is_active=True, **filters).order_by('pk')
+                    .select_for_update().values_list('pk', 'post_id')[:batch_size]
+                )
+                if not rows:
+                    return
+                cls.objects.filter(pk__in=[pk for pk, _ in rows]).update(is_active=False, last_modified=timezone.now())
+                deltas = defaultdict(int)
+                for _, post_id in rows:
+                    deltas[post_id] += 1
+                # Posts losing the same amount share a branch of the CASE
+                posts_by_delta = defaultdict(list)
+                for post_id, delta in deltas.items():
+                    posts_by_delta[delta].append(post_id)
+                counter = F(cls.post_counter_field) - Case(
+                    *[When(pk__in=post_ids, then=Value(delta)) for delta, post_ids in posts_by_delta.items()],
+                    output_field=IntegerField(),
+                )
+                post_model.objects.filter(pk__in=deltas).update(**{cls.post_counter_field: counter})
+            invalidate_cache(cls.cache_namespace)
+            yield len(rows)
+            if len(rows) < batch_size:
+                return
+
+    def _lock_counted_state(self):
+        # The stored post and active flag, locked until the transaction ends, so concurrent
+        # saves of the same row apply their counter changes one after the other
+        stored_state = (
+            type(self)._base_manager.select_for_update().filter(pk=self.pk).values_list('post_id', 'is_active').first()
+        )
+        return stored_state or (None, False)
+
+    def _update_post_counters(self, previous_post_id, previous_is_active, post_id, is_active):
+        deltas = defaultdict(int)
+        if previous_is_active:
+            deltas[previous_post_id] -= 1
+        if is_active:
+            deltas[post_id] += 1
+        post_model = self._meta.get_field('post').related_model
+        for counted_post_id, delta in deltas.items():
+            if delta:
+                counter = F(self.post_counter_field) + delta
+                post_model.objects.filter(pk=counted_post_id).update(**{self.post_counter_field: counter})
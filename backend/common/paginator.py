@@ -1,4 +1,18 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from functools import reduce
+from hashlib import md5
+from operator import or_
+from urllib.parse import urlencode
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+from common.cache import get_cache_versions, get_visibility_class
+from common.constants import COUNT_CACHE_TIMEOUT, ESTIMATED_COUNT_THRESHOLD
 
 class TenResultsSetPagination(PageNumberPagination):
     page_size = 10
@@ -8,4 +22,189 @@ class TenResultsSetPagination(PageNumberPagination):
 class TwentyResultsSetPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
-    max_page_size = 50
\ No newline at end of file
+    max_page_size = 50
+
+def get_reversed_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+class CachedCountPaginator(Paginator):
+    """
+    Django paginator that delegates the total count to a loader.
+    """
+    def __init__(self, object_list, per_page, count_loader, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_loader = count_loader
+
+    @cached_property
+    def count(self):
+        return self.count_loader(self.object_list)
+
+class CachedCountPaginationMixin:
+    """
+    Serve the total count of a page number pagination from the cache.
+
+    The count is cached per model, visibility class of the user and filters, and it expires
+    after `count_cache_timeout` seconds or when any of the view `cache_namespaces` is invalidated.
+    Unfiltered listings of large tables use the Postgres row estimate instead of COUNT(*).
+    """
+    count_cache_timeout = COUNT_CACHE_TIMEOUT
+    pagination_query_params = ('pagination',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.view = view
+        self.request = request
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, queryset, page_size):
+        return CachedCountPaginator(queryset, page_size, count_loader=self.get_count)
+
+    def get_count(self, queryset):
+        # Lists, such as cached post ids, are counted in memory
+        if not isinstance(queryset, QuerySet):
+            return len(queryset)
+        cache_key = self.get_count_cache_key(queryset)
+        count = cache.get(cache_key)
+        if count is None:
+            count = self.get_estimated_count(queryset)
+            if count is None:
+                count = queryset.count()
+            cache.set(cache_key, count, self.count_cache_timeout)
+        return count
+
+    def get_count_cache_key(self, queryset):
+        namespaces = getattr(self.view, 'cache_namespaces', ())
+        ignored_params = (self.page_query_param, self.page_size_query_param) + self.pagination_query_params
+        filters = sorted((key, values) for key, values in self.request.query_params.lists() if key not in ignored_params)
+        filters_digest = md5(urlencode(filters, doseq=True).encode()).hexdigest()
+        return ":".join([
+            "count",
+            queryset.model._meta.label_lower,
+            get_cache_versions(namespaces),
+            get_visibility_class(self.request.user),
+            filters_digest,
+        ])
+
+    def get_estimated_count(self, queryset):
+        # Only a listing of the whole table can use the table estimate
+        if queryset.query.where or connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        estimated_count = int(row[0]) if row else -1
+        # Small or never analyzed tables are counted exactly
+        if estimated_count < ESTIMATED_COUNT_THRESHOLD:
+            return None
+        return estimated_count
+
+class TenResultsSetCachedCountPagination(CachedCountPaginationMixin, TenResultsSetPagination):
+    pass
+
+class TwentyResultsSetCachedCountPagination(CachedCountPaginationMixin, TwentyResultsSetPagination):
+    pass
+
+class ModelOrderingCursorPagination(CursorPagination):
+    """
+    Cursor pagination that follows the `Meta.ordering` of the paginated model,
+    using the id as tie breaker, so deep pages cost the same as the first one.
+
+    DRF's cursor only keeps the first ordering field and pages the rows sharing it by offset.
+    Here the position holds every ordering field, such as `(created_at, id)`, and the page starts
+    after it with a keyset comparison of the whole tuple, so every position is unique and the
+    cursors never need an offset.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(queryset.model._meta.ordering)
+        direction = '-' if ordering[0].startswith('-') else ''
+        return tuple(ordering + [f'{direction}id'])
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Same flow as CursorPagination.paginate_queryset, with the keyset filter of the whole position
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        ordering = get_reversed_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(ordering, current_position))
+
+        # An extra row tells whether a page follows
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+        following_position = self._get_position_from_instance(results[-1], self.ordering) if has_following_position else None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_keyset_filter(self, ordering, position):
+        """
+        Get the filter of the rows that follow a position in an ordering.
+
+        A row follows `(x, y)` in the ordering `(a, b)` when `a` follows `x`, or `a` equals `x`
+        and `b` follows `y`, each field compared in its own direction.
+
+        Args:
+            ordering: The ordering of the queryset, already reversed for previous pages.
+            position: The encoded values of the ordering fields.
+
+        Returns:
+            The Q object matching the rows after the position.
+        """
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        conditions = []
+        equal_fields = {}
+        for field, value in zip(ordering, values):
+            field_name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            conditions.append(Q(**equal_fields, **{f'{field_name}__{lookup}': value}))
+            equal_fields[field_name] = value
+        return reduce(or_, conditions)
+
+    def _get_position_from_instance(self, instance, ordering):
+        # Every ordering field, so rows sharing the first one still have distinct positions
+        field_names = [field.lstrip('-') for field in ordering]
+        if isinstance(instance, dict):
+            return json.dumps([str(instance[field_name]) for field_name in field_names])
+        return json.dumps([str(getattr(instance, field_name)) for field_name in field_names])
+
+class TenResultsSetCursorPagination(ModelOrderingCursorPagination):
+    page_size = 10
+
+class TwentyResultsSetCursorPagination(ModelOrderingCursorPagination):
+    page_size = 20
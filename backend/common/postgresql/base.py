@@ -0,0 +1,85 @@
+import time
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+from common.metrics import record_connection
+from common.postgresql.creation import DatabaseCreation
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend with an optional psycopg connection pool.
+
+    The pool is enabled with `OPTIONS['pool']`, a dict of `psycopg_pool.ConnectionPool` arguments
+    such as `min_size`, `max_size` and `timeout`. Django takes a connection from the pool when it
+    opens one and returns it when it closes it, so pooling requires `CONN_MAX_AGE = 0`. Django 5.1
+    supports this natively, this backend brings it to 5.0.
+
+    The time spent opening a connection or waiting for one from the pool is recorded in the
+    `db_connection_acquire_seconds` histogram.
+    """
+
+    creation_class = DatabaseCreation
+
+    # Pools by alias, shared by the threads of the process
+    _connection_pools = {}
+
+    @property
+    def pool(self):
+        pool_options = self.settings_dict['OPTIONS'].get('pool')
+        if self.alias == NO_DB_ALIAS or not pool_options:
+            return None
+
+        if self.alias not in self._connection_pools:
+            if self.settings_dict['CONN_MAX_AGE'] != 0:
+                raise ImproperlyConfigured("Pooling does not support persistent connections, set CONN_MAX_AGE to 0")
+            try:
+                from psycopg_pool import ConnectionPool
+            except ImportError as error:
+                raise ImproperlyConfigured("Error loading psycopg_pool module, install psycopg[pool]") from error
+            pool = ConnectionPool(
+                kwargs=self.get_connection_params(),
+                # Opened by the first connection, so a forked worker never inherits the connections of its master
+                open=False,
+                check=ConnectionPool.check_connection if self.settings_dict['CONN_HEALTH_CHECKS'] else None,
+                **pool_options,
+            )
+            # Threads racing at startup may build several pools, the first one to be set wins
+            self._connection_pools.setdefault(self.alias, pool)
+        return self._connection_pools[self.alias]
+
+    def close_pool(self):
+        pool = self._connection_pools.pop(self.alias, None)
+        if pool is not None:
+            pool.close()
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        start = time.perf_counter()
+        pool = self.pool
+        if pool is None:
+            connection = super().get_new_connection(conn_params)
+        else:
+            pool.open()
+            connection = pool.getconn()
+            self.isolation_level = base.IsolationLevel(
+                self.settings_dict['OPTIONS'].get('isolation_level', base.IsolationLevel.READ_COMMITTED)
+            )
+            connection.isolation_level = self.isolation_level
+        record_connection('direct' if pool is None else 'pool', time.perf_counter() - start)
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if self.connection is None or pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
+            # The connection belongs to the pool again and can no longer be used
+            self.connection = None
@@ -0,0 +1,9 @@
+from django.db.backends.postgresql import creation
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def destroy_test_db(self, *args, **kwargs):
+        # The idle connections of the pool would keep the test database in use
+        self.connection.close_pool()
+        return super().destroy_test_db(*args, **kwargs)
@@ -0,0 +1,65 @@
+import time
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from category.models import Category
+from permission.models import Permission
+from common.cache import get_cache_version, invalidate_cache
+from common.constants import REGISTRY_MISS_RELOAD_INTERVAL, REGISTRY_VERSION_CHECK_INTERVAL, CacheNamespace
+
+# Categories and permissions are a handful of static rows, they are loaded once per process
+# and reloaded after any write so the access checks never join their tables. A write bumps the
+# shared REGISTRY version, which every process compares with the one it loaded at most once per
+# interval, so a rename in one worker reaches the others
+_registry = {}
+_loaded_at = {}
+_versions = {}
+_checked_at = {}
+
+
+def _get_rows(model):
+    if model in _registry and time.monotonic() - _checked_at[model] >= REGISTRY_VERSION_CHECK_INTERVAL:
+        _checked_at[model] = time.monotonic()
+        if get_cache_version(CacheNamespace.REGISTRY) != _versions[model]:
+            _registry.pop(model, None)
+    if model not in _registry:
+        # The version is read first, a write during the load is caught by the next check
+        _versions[model] = get_cache_version(CacheNamespace.REGISTRY)
+        _registry[model] = {instance.id: instance for instance in model.objects.all()}
+        _loaded_at[model] = _checked_at[model] = time.monotonic()
+    return _registry[model]
+
+def _get(model, instance_id):
+    # A row created by another process is missing until the registry is reloaded. Unknown ids
+    # reload it at most once per interval, so a request full of bogus ids does not query per id
+    rows = _get_rows(model)
+    if instance_id not in rows and time.monotonic() - _loaded_at[model] >= REGISTRY_MISS_RELOAD_INTERVAL:
+        _registry.pop(model, None)
+        rows = _get_rows(model)
+    return rows.get(instance_id)
+
+def _get_id(model, name):
+    return next((instance.id for instance in _get_rows(model).values() if instance.name == name), None)
+
+def get_category(category_id):
+    return _get(Category, category_id)
+
+def get_category_name(category_id):
+    return get_category(category_id).name
+
+def get_category_id(category_name):
+    return _get_id(Category, category_name)
+
+def get_permission(permission_id):
+    return _get(Permission, permission_id)
+
+def get_permission_name(permission_id):
+    return get_permission(permission_id).name
+
+def get_permission_id(permission_name):
+    return _get_id(Permission, permission_name)
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Permission)
+def reload_registry(sender, **kwargs):
+    _registry.pop(sender, None)
+    invalidate_cache(CacheNamespace.REGISTRY)
@@ -0,0 +1,20 @@
+from rest_framework import serializers
+from common.validators import validate_user
+from post.models import Post
+from user.models import CustomUser
+
+class BulkDeactivateSerializer(serializers.Serializer):
+    # The rows of a user, of a post, or of a user in a post
+    user = serializers.PrimaryKeyRelatedField(queryset=CustomUser.objects.all(), required=False)
+    post = serializers.PrimaryKeyRelatedField(queryset=Post.objects.all(), required=False)
+
+    def validate_user(self, user):
+        # Admin users can deactivate the rows of any user
+        if self.context['request'].user.is_staff:
+            return user
+        return validate_user(user, serializer_self=self)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("A user or a post is required.")
+        return attrs
@@ -0,0 +1,138 @@
+import os
+import re
+import traceback
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+
+class QueryPlanTestMixin:
+    """
+    A mixin for asserting the PostgreSQL plans of the queries executed by a request.
+
+    Sequential scans are disabled while explaining, so the planner only picks one when no index
+    can answer the query. This keeps the assertions independent of the size of the seeded dataset.
+    """
+
+    def get_request_queries(self, url, data=None):
+        """
+        Execute a GET request and capture its queries.
+
+        Args:
+            url: The url of the request.
+            data: The query params of the request.
+
+        Returns:
+            The list of executed SQL statements.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [query['sql'] for query in queries.captured_queries]
+
+    def get_query_on(self, queries, table, *fragments):
+        """
+        Get the first query that reads from a table and contains every fragment.
+
+        Args:
+            queries: The captured SQL statements.
+            table: The table the query reads from.
+            fragments: The SQL fragments that identify the query.
+
+        Returns:
+            The matching SQL statement.
+        """
+        matching_queries = [
+            sql for sql in queries
+            if f'FROM "{table}"' in sql and all(fragment in sql for fragment in fragments)
+        ]
+        self.assertTrue(matching_queries, f"No query on {table} was executed")
+        return matching_queries[0]
+
+    def get_query_plan(self, sql):
+        with connection.cursor() as cursor:
+            # The tables of the test database have no statistics until they are analyzed
+            cursor.execute('ANALYZE')
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+            cursor.execute('RESET enable_seqscan')
+        return plan
+
+    def assertQueryUsesIndex(self, sql, index_name):
+        plan = self.get_query_plan(sql)
+        self.assertIn(index_name, plan, plan)
+        self.assertNotIn('Seq Scan', plan, plan)
+
+
+def get_query_shape(sql):
+    # Replace the literals so queries that only differ in their parameters share a shape
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    return re.sub(r'\(\?(?:, \?)*\)', '(?, ...)', sql)
+
+
+class QueryShapeRecorder:
+    # Execute wrapper that records every query with the frames that executed it, up to the ORM
+    stack_limit = 8
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        orm_path = os.path.join('django', 'db', '')
+        frames = [
+            frame for frame in traceback.extract_stack()[:-1]
+            if orm_path not in frame.filename
+        ]
+        self.queries.append((sql, frames[-self.stack_limit:]))
+        return execute(sql, params, many, context)
+
+
+class NPlusOneQueryTestMixin:
+    """
+    A mixin for detecting list endpoints whose query count grows with the page size.
+
+    The endpoint is requested with a small and a large page, with a cold cache. When the large page
+    executes more queries, the test fails with the repeated query shapes and the application stack
+    that executed them.
+    """
+
+    page_size_query_param = 'page_size'
+
+    def record_request_queries(self, url, data):
+        cache.clear()
+        recorder = QueryShapeRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.client.get(url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return recorder.queries
+
+    def assertNoNPlusOneQueries(self, url, data=None, small_page_size=1, large_page_size=10):
+        """
+        Assert that the queries of a list endpoint do not grow with the page size.
+
+        Args:
+            url: The url of the list endpoint.
+            data: The query params of the request.
+            small_page_size: The size of the page used as reference.
+            large_page_size: The size of the page that must cost the same number of queries.
+        """
+        data = data or {}
+        small_page_queries = self.record_request_queries(url, {**data, self.page_size_query_param: small_page_size})
+        large_page_queries = self.record_request_queries(url, {**data, self.page_size_query_param: large_page_size})
+        if len(large_page_queries) <= len(small_page_queries):
+            return
+
+        shapes = {}
+        for sql, frames in large_page_queries:
+            shapes.setdefault(get_query_shape(sql), []).append(frames)
+        repeated_queries = [
+            f"{len(executions)} x {shape}\n{''.join(traceback.format_list(executions[-1]))}"
+            for shape, executions in shapes.items() if len(executions) > 1
+        ]
+        self.fail(
+            f"{len(small_page_queries)} queries for a page of {small_page_size} and {len(large_page_queries)} "
+            f"for a page of {large_page_size}, the repeated queries are:\n" + "\n".join(repeated_queries)
+        )
@@ -0,0 +1,51 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase
+from common.metrics import render_metrics, reset_metrics
+from common.postgresql.base import DatabaseWrapper
+
+
+class DatabaseWrapperTests(TestCase):
+
+    def setUp(self):
+        reset_metrics()
+
+    def get_connection(self, alias, **settings):
+        # A separate connection to the test database, so opening and closing it does not affect the test transaction
+        settings_dict = {**connection.settings_dict, **settings}
+        database = DatabaseWrapper(settings_dict, alias=alias)
+        self.addCleanup(database.close_pool)
+        self.addCleanup(database.close)
+        return database
+
+    def test_opening_a_connection_records_the_acquire_time(self):
+        # Arrange
+        database = self.get_connection('direct', CONN_MAX_AGE=0, OPTIONS={})
+        # Act
+        database.ensure_connection()
+        database.close()
+        # Assert
+        self.assertIsNone(database.pool)
+        self.assertIn('db_connection_acquire_seconds_count{mode="direct"} 1', render_metrics())
+
+    def test_connections_are_taken_from_the_pool_and_returned_to_it_when_closed(self):
+        # Arrange
+        database = self.get_connection('pool', CONN_MAX_AGE=0, OPTIONS={'pool': {'min_size': 1, 'max_size': 1}})
+        # Act
+        for _ in range(3):
+            with database.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            database.close()
+        # Assert
+        stats = database.pool.get_stats()
+        self.assertIsNone(database.connection)
+        self.assertEqual(stats['requests_num'], 3)
+        self.assertEqual(stats['connections_num'], 1)
+        self.assertIn('db_connection_acquire_seconds_count{mode="pool"} 3', render_metrics())
+
+    def test_the_pool_can_not_be_used_with_persistent_connections(self):
+        # Arrange
+        database = self.get_connection('persistent', CONN_MAX_AGE=60, OPTIONS={'pool': {'max_size': 1}})
+        # Act & Assert
+        with self.assertRaises(ImproperlyConfigured):
+            database.ensure_connection()
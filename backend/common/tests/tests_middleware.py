@@ -0,0 +1,106 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+from prometheus_client.values import MultiProcessValue
+from category.tests.factories import CategoryFactory
+from common.constants import DEFAULT_ACCESS_CONTROL
+from common.metrics import record_request, render_metrics, reset_metrics
+from permission.tests.factories import PermissionFactory
+from post.tests.factories import PostFactory, PostCategoryPermissionFactory
+from user.tests.factories import CustomUserFactory
+
+
+class QueryInstrumentationMiddlewareTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        reset_metrics()
+        PermissionFactory.create_batch()
+        CategoryFactory.create_batch()
+        posts = PostFactory.create_batch(3)
+        PostCategoryPermissionFactory.create_batch(posts, category_permission=DEFAULT_ACCESS_CONTROL)
+        self.url = reverse('post-list-create')
+        self.metrics_url = reverse('metrics')
+
+    def get_server_timing(self, response):
+        return dict(
+            (metric.split(';')[0], metric) for metric in response['Server-Timing'].split(', ')
+        )
+
+    def test_the_response_has_the_query_count_and_database_time_in_the_server_timing_header(self):
+        # Act
+        # Count, page with author and team, category permissions
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        # Assert
+        server_timing = self.get_server_timing(response)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('desc="3 queries"', server_timing['db'])
+        self.assertIn('db-slowest', server_timing)
+        self.assertIn('total', server_timing)
+
+    @override_settings(SERVER_TIMING_ENABLED=False)
+    def test_the_server_timing_header_can_be_disabled(self):
+        # Act
+        response = self.client.get(self.url)
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_the_slowest_query_is_logged_when_it_exceeds_the_threshold(self):
+        # Act
+        with self.assertLogs('common.middleware', level='WARNING') as logs:
+            self.client.get(self.url)
+        # Assert
+        self.assertIn('GET post-list-create', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+    def test_admin_user_can_read_the_request_histograms_by_url_name(self):
+        # Arrange
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.client.force_login(CustomUserFactory(is_staff=True))
+        # Act
+        response = self.client.get(self.metrics_url)
+        # Assert
+        metrics = response.content.decode()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('http_request_duration_seconds_count{method="GET",url_name="post-list-create"} 2.0', metrics)
+        self.assertIn('http_request_db_queries_bucket{le="+Inf",method="GET",url_name="post-list-create"} 2.0', metrics)
+        self.assertIn('# TYPE http_request_db_duration_seconds histogram', metrics)
+
+    @override_settings(METRICS_TOKEN='scraper-token')
+    def test_a_scraper_can_read_the_metrics_with_the_metrics_token(self):
+        # Act
+        response = self.client.get(self.metrics_url, HTTP_AUTHORIZATION='Bearer scraper-token')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN='scraper-token')
+    def test_unauthenticated_user_can_not_read_the_metrics_and_403_is_returned(self):
+        # Act
+        response = self.client.get(self.metrics_url, HTTP_AUTHORIZATION='Bearer wrong-token')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_the_metrics_of_every_worker_process_are_added_up_in_multiprocess_mode(self):
+        # Arrange
+        metrics_dir = self.enterContext(TemporaryDirectory())
+        self.enterContext(patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': metrics_dir}))
+        self.addCleanup(reset_metrics)
+        for worker_pid in (101, 102):
+            # Every worker writes its histograms to its own files
+            with patch('prometheus_client.values.ValueClass', MultiProcessValue(lambda: worker_pid)):
+                reset_metrics()
+                record_request('post-list-create', 'GET', 0.01, 3, 0.002)
+        # Act
+        metrics = render_metrics()
+        # Assert
+        self.assertIn('http_request_duration_seconds_count{method="GET",url_name="post-list-create"} 2.0', metrics)
+        self.assertIn('http_request_db_queries_sum{method="GET",url_name="post-list-create"} 6.0', metrics)
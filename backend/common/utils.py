@@ -1,4 +1,4 @@
-from common.constants import AccessCategory, AccessPermission
+from common.constants import AccessCategory, AccessPermission, ACCESS_CATEGORY_OFFSET, ACCESS_PERMISSION_BITS
 
 def create_default_category_permissions_handler(categories, permissions):
     read_permission = next((p for p in permissions if p.name == AccessPermission.READ), None)
@@ -18,4 +18,19 @@ def create_custom_category_permissions_handler(categories, permissions, custom_p
     for category in categories:
         permission = next((p for p in permissions if p.name == custom_permissions[category.name]), None)
         category_permissions.append({"category": category.id, "permission": permission.id})
-    return category_permissions
\ No newline at end of file
+    return category_permissions
+
+def get_access_bits(category_name, permission_name):
+    # Bits of the post access bitmap granted by a permission on a category
+    return ACCESS_PERMISSION_BITS[permission_name] << ACCESS_CATEGORY_OFFSET[category_name]
+
+def get_access_slot(category_name):
+    # Every bit of the post access bitmap owned by a category
+    return get_access_bits(category_name, AccessPermission.EDIT)
+
+def get_access_mask(category_names, access_bit):
+    # Mask that matches the access bit (read or edit) in any of the given categories
+    mask = 0
+    for category_name in category_names:
+        mask |= access_bit << ACCESS_CATEGORY_OFFSET[category_name]
+    return mask
@@ -0,0 +1,92 @@
+"""
+Gunicorn configuration of the production serving profile.
+
+Run it from the backend directory with:
+    gunicorn --config gunicorn.conf.py avanzatech_blog.wsgi
+
+Every value can be tuned through the environment, see .envexample.
+"""
+
+import multiprocessing
+import os
+import shutil
+import time
+# Every module level name is read as a gunicorn setting and config is one of them
+from decouple import config as env
+
+_started_at = time.monotonic()
+
+bind = env('GUNICORN_BIND', default='0.0.0.0:8000')
+
+# Pre-forked workers with a few threads each, the requests spend most of their time waiting on the
+# database so threads add concurrency without the memory of a whole process
+workers = env('GUNICORN_WORKERS', default=multiprocessing.cpu_count() * 2 + 1, cast=int)
+threads = env('GUNICORN_THREADS', default=4, cast=int)
+worker_class = 'gthread'
+
+# The application is imported once in the master and the workers are forked from it, so a restart
+# pays the import once and the workers share its memory. No database connection is opened at import.
+preload_app = True
+
+timeout = env('GUNICORN_TIMEOUT', default=30, cast=int)
+graceful_timeout = env('GUNICORN_GRACEFUL_TIMEOUT', default=30, cast=int)
+keepalive = env('GUNICORN_KEEPALIVE', default=5, cast=int)
+
+# Workers are recycled after a number of requests to bound memory growth, the jitter avoids
+# restarting all of them at once
+max_requests = env('GUNICORN_MAX_REQUESTS', default=1000, cast=int)
+max_requests_jitter = max_requests // 10
+
+# The heartbeat file lives in memory instead of the container filesystem
+worker_tmp_dir = env('GUNICORN_WORKER_TMP_DIR', default='/dev/shm')
+
+accesslog = '-'
+errorlog = '-'
+
+# Every worker writes its metrics to files in this directory and /api/metrics/ adds them up, so a
+# scrape covers the whole server. prometheus_client reads it on import, before the app is loaded
+PROMETHEUS_MULTIPROC_DIR = env('PROMETHEUS_MULTIPROC_DIR', default='/dev/shm/prometheus')
+os.environ['PROMETHEUS_MULTIPROC_DIR'] = PROMETHEUS_MULTIPROC_DIR
+
+# Seconds the master may take from start until it is ready to fork the workers
+STARTUP_BUDGET_SECONDS = env('STARTUP_BUDGET_SECONDS', default=10, cast=float)
+STARTUP_BUDGET_STRICT = env('STARTUP_BUDGET_STRICT', default=False, cast=bool)
+
+LOCMEM_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+def on_starting(server):
+    # The files of a previous run would be added to the metrics of this one
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def when_ready(server):
+    # The local-memory cache lives in each worker, so their cached versions drift apart and an
+    # invalidation in one worker leaves the others serving stale responses
+    from django.conf import settings
+    if server.cfg.workers > 1 and settings.CACHES['default']['BACKEND'] == LOCMEM_CACHE_BACKEND:
+        server.log.error(
+            "%s is per process and cannot be shared by %d workers, set CACHE_BACKEND to a shared "
+            "backend such as django.core.cache.backends.redis.RedisCache or run GUNICORN_WORKERS=1",
+            LOCMEM_CACHE_BACKEND, server.cfg.workers,
+        )
+        server.halt("cache backend not shared by the workers", exit_status=1)
+
+    # The url configuration is loaded lazily on the first request, load it before forking so
+    # every worker inherits it
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+
+    elapsed = time.monotonic() - _started_at
+    if elapsed <= STARTUP_BUDGET_SECONDS:
+        server.log.info("Application ready in %.2f s (budget %.2f s)", elapsed, STARTUP_BUDGET_SECONDS)
+        return
+    server.log.error("Application ready in %.2f s, over the startup budget of %.2f s", elapsed, STARTUP_BUDGET_SECONDS)
+    if STARTUP_BUDGET_STRICT:
+        server.halt("startup budget exceeded", exit_status=1)
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-17 12:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('like', '0006_alter_like_unique_together'),
+        ('post', '0012_post_post_created_at_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='like',
+            options={'ordering': ['-last_modified']},
+        ),
+        migrations.AddIndex(
+            model_name='like',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['post', '-last_modified'], name='like_active_post_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='like',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user', '-last_modified'], name='like_active_user_idx'),
+        ),
+    ]
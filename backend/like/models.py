@@ -1,20 +1,158 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import F
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from common.models import BaseModel
-from common.constants import STATUS, STATUS_CHOICES
+from common.models import PostCounterModel
+from common.cache import invalidate_cache
+from common.constants import STATUS, STATUS_CHOICES, CacheNamespace
 from user.models import CustomUser
 from post.models import Post
 
 
-class Like(BaseModel):
+class Like(PostCounterModel):
+
+    post_counter_field = 'like_count'
+    cache_namespace = CacheNamespace.LIKE
 
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
     is_active = models.BooleanField(default=True)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_cache(CacheNamespace.LIKE)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_cache(CacheNamespace.LIKE)
+        return result
     
+    @classmethod
+    def activate(cls, user, post):
+        """
+        Like a post for a user with a single atomic upsert.
+
+        The like is inserted, or reactivated when it was deleted, with
+        `INSERT ... ON CONFLICT (user, post) DO UPDATE`, so concurrent likes of the same user on the
+        same post never fail with an integrity error and only one of them counts. Other database
+        vendors run the ORM fallback of `_set_active`.
+
+        Args:
+            user: The user liking the post.
+            post: The post, the caller has checked the user can read it.
+
+        Returns:
+            The active like, or None when the user already likes the post.
+        """
+        rows = cls._set_active(user.id, [post.id], True)
+        if not rows:
+            return None
+        like_id, _, created_at, last_modified = rows[0]
+        like = cls(id=like_id, user=user, post=post, is_active=True, created_at=created_at, last_modified=last_modified)
+        # The row is stored, a later save updates it
+        like._state.adding = False
+        like._state.db = connection.alias
+        return like
+
+    @classmethod
+    def bulk_set_active(cls, user_id, post_ids, is_active):
+        """
+        Like or unlike many posts for a user with a single statement.
+
+        Likes are inserted or reactivated with `INSERT ... ON CONFLICT (user, post) DO UPDATE`, unlikes
+        deactivate the active likes, and the counters of the changed posts are updated with one
+        `UPDATE`. Posts already in the requested state are left untouched. Other database vendors
+        run the ORM fallback of `_set_active`.
+
+        Args:
+            user_id: The id of the user liking the posts.
+            post_ids: The ids of the posts, the caller has checked the user can read them.
+            is_active: True to like the posts, False to unlike them.
+
+        Returns:
+            The ids of the posts whose like changed.
+        """
+        return sorted(post_id for _, post_id, _, _ in cls._set_active(user_id, post_ids, is_active))
+
+    @classmethod
+    def _set_active(cls, user_id, post_ids, is_active):
+        # Returns the id, post, creation and modification dates of the changed likes
+        # Sorted so concurrent batches lock the rows in the same order
+        post_ids = sorted(set(post_ids))
+        if not post_ids:
+            return []
+        now = timezone.now()
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                rows = cls._set_active_upsert(user_id, post_ids, is_active, now)
+            else:
+                rows = cls._set_active_orm(user_id, post_ids, is_active, now)
+            if rows:
+                counter = F(cls.post_counter_field) + (1 if is_active else -1)
+                Post.objects.filter(pk__in=[row[1] for row in rows]).update(**{cls.post_counter_field: counter})
+        if rows:
+            invalidate_cache(CacheNamespace.LIKE)
+        return rows
+
+    @classmethod
+    def _set_active_upsert(cls, user_id, post_ids, is_active, now):
+        table = connection.ops.quote_name(cls._meta.db_table)
+        with connection.cursor() as cursor:
+            if is_active:
+                cursor.execute(
+                    f"""
+                    INSERT INTO {table} (user_id, post_id, is_active, created_at, last_modified)
+                    SELECT %s, post_id, TRUE, %s, %s FROM unnest(%s::bigint[]) AS post_id
+                    ON CONFLICT (user_id, post_id) DO UPDATE
+                    SET is_active = TRUE, last_modified = EXCLUDED.last_modified
+                    WHERE NOT {table}.is_active
+                    RETURNING id, post_id, created_at, last_modified
+                    """,
+                    [user_id, now, now, post_ids],
+                )
+            else:
+                cursor.execute(
+                    f"""
+                    UPDATE {table} SET is_active = FALSE, last_modified = %s
+                    WHERE user_id = %s AND post_id = ANY(%s::bigint[]) AND is_active
+                    RETURNING id, post_id, created_at, last_modified
+                    """,
+                    [now, user_id, post_ids],
+                )
+            return cursor.fetchall()
+
+    @classmethod
+    def _set_active_orm(cls, user_id, post_ids, is_active, now):
+        # Without the upsert the likes of the user are locked and read, the ones in the other state
+        # are updated and the missing ones created. A concurrent like of the same post may fail
+        # with an integrity error instead of being ignored.
+        likes = list(
+            cls.objects.select_for_update().filter(user_id=user_id, post_id__in=post_ids)
+            .values_list('id', 'post_id', 'is_active', 'created_at')
+        )
+        rows = [(pk, post_id, created_at, now) for pk, post_id, active, created_at in likes if active != is_active]
+        if rows:
+            cls.objects.filter(pk__in=[row[0] for row in rows]).update(is_active=is_active, last_modified=now)
+        if is_active:
+            liked_post_ids = {post_id for _, post_id, _, _ in likes}
+            new_post_ids = [post_id for post_id in post_ids if post_id not in liked_post_ids]
+            if new_post_ids:
+                cls.objects.bulk_create([cls(user_id=user_id, post_id=post_id) for post_id in new_post_ids])
+                # Some vendors do not return the ids of the inserted rows
+                rows += list(
+                    cls.objects.filter(user_id=user_id, post_id__in=new_post_ids)
+                    .values_list('id', 'post_id', 'created_at', 'last_modified')
+                )
+        return rows
+
     def __str__(self):
         return f"{str(self.user)} likes the post {str(self.post)}"
         
     class Meta:
         unique_together = ('user', 'post')
-        ordering = ["-last_modified"]
\ No newline at end of file
+        ordering = ["-last_modified"]
+        indexes = [
+            # Active likes of a post and of a user in the list order
+            models.Index(fields=['post', '-last_modified'], condition=models.Q(is_active=True), name='like_active_post_idx'),
+            models.Index(fields=['user', '-last_modified'], condition=models.Q(is_active=True), name='like_active_user_idx'),
+        ]
\ No newline at end of file
@@ -1,39 +1,33 @@
 from django.forms.models import model_to_dict
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator
+from rest_framework.settings import api_settings
 from user.serializers import CustomUserSerializer
 from like.models import Like
-from common.constants import Status
+from common.constants import BULK_LIKE_MAX_POSTS, Status
 from common.validators import validate_user
+from post.models import Post
 
 class LikeCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Like
         fields = ['id','user','post','is_active']
         read_only_fields = ('id','is_active')
+        # The post author is needed by check_permissions
+        extra_kwargs = {'post': {'queryset': Post.objects.select_related('user')}}
+        # Uniqueness is enforced by the upsert in create, a query beforehand would race with it
+        validators = []
     
     def validate_user(self, user):
         return validate_user(user, serializer_self=self)
 
-    def run_validation(self, data=serializers.empty):
-        # Check the payload
-        post = data.get('post')
-        user = data.get('user')
-        if post is None or user is None:
-            return super().run_validation(data)
-        
-        # Check if 'is_active' is False in the database
-        like_in_db = Like.objects.filter(post=data['post'], user=data['user']).first()
-        is_active_in_database = like_in_db and not like_in_db.is_active
-
-        # If 'is_active' is False, skip uniqueness validation for user and post
-        if is_active_in_database:
-            self.fields['user'].validators = []
-            self.fields['post'].validators = []
-            self.instance = like_in_db
-            self.instance.is_active = True
-    
-        return super().run_validation(data)
+    def create(self, validated_data):
+        # Inserts the like or reactivates a deleted one in a single statement
+        like = Like.activate(validated_data['user'], validated_data['post'])
+        if like is None:
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: ["The fields user, post must make a unique set."]}, code='unique'
+            )
+        return like
 
 class LikeListSerializer(serializers.ModelSerializer):
     user = CustomUserSerializer(read_only=True)
@@ -48,3 +42,9 @@ class LikeDeleteSerializer(serializers.ModelSerializer):
         model = Like
         fields = ['id','user','post','is_active']
         read_only_fields = ('id','user','post','is_active')
+
+
+class LikeBulkSerializer(serializers.Serializer):
+    posts = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=BULK_LIKE_MAX_POSTS)
+    # True likes the posts, False unlikes them
+    is_active = serializers.BooleanField(default=True)
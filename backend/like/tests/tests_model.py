@@ -123,4 +123,69 @@ class LikeModelTests(TestCase):
         with self.assertRaises(IntegrityError):
             LikeFactory(user=user, post=post)
 
+    def test_create_an_active_like_increases_the_like_count_of_the_post(self):
+        # Arrange
+        post = PostFactory()
+        # Act
+        LikeFactory.create_batch(2, post=post)
+        post_db = Post.objects.get(id=post.id)
+        # Assert
+        self.assertEqual(post_db.like_count, 2)
+
+    def test_deactivate_and_reactivate_a_like_updates_the_like_count_of_the_post(self):
+        # Arrange
+        post = PostFactory()
+        like = LikeFactory(post=post)
+        like_db = Like.objects.get(id=like.id)
+        # Act
+        like_db.is_active = False
+        like_db.save()
+        count_after_deactivate = Post.objects.get(id=post.id).like_count
+        like_db.save()
+        count_after_second_save = Post.objects.get(id=post.id).like_count
+        like_db.is_active = True
+        like_db.save()
+        count_after_reactivate = Post.objects.get(id=post.id).like_count
+        # Assert
+        self.assertEqual(count_after_deactivate, 0)
+        self.assertEqual(count_after_second_save, 0)
+        self.assertEqual(count_after_reactivate, 1)
+
+    def test_deactivate_a_like_twice_from_stale_instances_decrements_the_like_count_once(self):
+        # Arrange
+        post = PostFactory()
+        like = LikeFactory(post=post)
+        first_request_like = Like.objects.get(id=like.id)
+        second_request_like = Like.objects.get(id=like.id)
+        # Act
+        for stale_like in (first_request_like, second_request_like):
+            stale_like.is_active = False
+            stale_like.save(update_fields=['is_active', 'last_modified'])
+        post_db = Post.objects.get(id=post.id)
+        # Assert
+        self.assertEqual(post_db.like_count, 0)
+
+    def test_an_activated_like_is_updated_when_it_is_saved_again(self):
+        # Arrange
+        post = PostFactory()
+        like = Like.activate(CustomUserFactory(), post)
+        # Act
+        like.is_active = False
+        like.save()
+        post_db = Post.objects.get(id=post.id)
+        # Assert
+        self.assertEqual(Like.objects.count(), 1)
+        self.assertEqual(post_db.like_count, 0)
+
+    def test_a_stale_post_save_does_not_overwrite_the_like_count(self):
+        # Arrange
+        post = PostFactory()
+        LikeFactory(post=post)
+        # Act
+        post.title = "new title"
+        post.save()
+        post_db = Post.objects.get(id=post.id)
+        # Assert
+        self.assertEqual(post_db.title, "new title")
+        self.assertEqual(post_db.like_count, 1)
 
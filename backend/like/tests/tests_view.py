@@ -1,17 +1,27 @@
-from rest_framework.test import APITestCase
+import threading
+from unittest import skipUnless
+from unittest.mock import patch
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
 from rest_framework.reverse import reverse
 from rest_framework import status
 from like.models import Like
+from like.views import BulkDeleteLikeView
 from like.tests.factories import LikeFactory
 from user.tests.factories import CustomUserFactory
 from user.models import CustomUser
 from post.tests.factories import PostFactory, PostCategoryPermissionFactory
 from post.models import Post
 from team.tests.factories import TeamFactory
-from common.constants import AccessCategory, AccessPermission, CATEGORIES
+from common.constants import AccessCategory, AccessPermission, CATEGORIES, CONTENT_MOCK, DEFAULT_ACCESS_CONTROL
+from common.utils import get_access_bits
 from common.constants import Status
+from common.validators import check_permissions
 from category.tests.factories import CategoryFactory
 from permission.tests.factories import PermissionFactory
+from common.tests.mixins import NPlusOneQueryTestMixin, QueryPlanTestMixin
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 class LikeCreateViewTests(APITestCase):
 
@@ -207,6 +217,16 @@ class LikeCreateViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertEqual(Like.objects.count(), expected_likes_db)
 
+    def test_permissions_of_a_like_are_checked_without_extra_queries_once_the_post_is_loaded(self):
+        # Arrange
+        another_user = CustomUserFactory(team=self.team)
+        post = PostFactory(user=another_user)
+        PostCategoryPermissionFactory.create(post=post, category_permission=self.factory_category_permission)
+        post = Post.objects.select_related('user').get(id=post.id)
+        # Act & Assert
+        with self.assertNumQueries(0):
+            self.assertTrue(check_permissions(self.user, post))
+
     def test_a_logged_in_user_can_not_create_a_like_in_a_post_that_does_not_exist(self):
         # Arrange
         post = PostFactory()
@@ -1134,6 +1154,22 @@ class LikeListViewTests(APITestCase):
         self.assertEqual(results[2]['id'], expected_order[2])
 
 
+    def test_likes_are_listed_by_last_modified_order_with_cursor_pagination(self):
+        # Arrange
+        post = PostFactory()
+        PostCategoryPermissionFactory.create(post=post, category_permission=self.factory_category_permission)
+        likes = [LikeFactory(post=post, is_active=True) for _ in range(3)]
+        expected_order = [like.id for like in reversed(likes)]
+        # Act
+        response = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 2})
+        first_page = [result['id'] for result in response.data.get('results')]
+        response = self.client.get(response.data.get('next'))
+        second_page = [result['id'] for result in response.data.get('results')]
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(first_page + second_page, expected_order)
+        self.assertIsNone(response.data.get('next'))
+
 class LikeDeleteViewTests(APITestCase):
 
     def setUp(self):
@@ -1176,6 +1212,19 @@ class LikeDeleteViewTests(APITestCase):
         self.assertFalse(like_db[0].is_active)
 
 
+    def test_soft_delete_only_writes_the_active_flag_and_the_modification_date(self):
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(self.url)
+        # Assert
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE "like_like"')]
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(len(updates), 1)
+        self.assertIn('SET "last_modified"', updates[0])
+        self.assertIn('"is_active"', updates[0])
+        self.assertNotIn('"created_at"', updates[0])
+        self.assertNotIn('"post_id"', updates[0].split('WHERE')[0])
+
     def test_logged_in_user_can_not_soft_delete_like_created_by_other_user(self):
         # Arrange
         other_user = CustomUserFactory()
@@ -1243,4 +1292,391 @@ class LikeDeleteViewTests(APITestCase):
 
         
         
- 
\ No newline at end of file
+ 
+class LikeQueryPlanViewTests(QueryPlanTestMixin, APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.team = TeamFactory()
+        self.user = CustomUserFactory(team=self.team)
+        self.client.force_authenticate(self.user)
+        self.url = reverse('like-list-create')
+        self.factory_category_permission = {
+            AccessCategory.PUBLIC: AccessPermission.READ,
+            AccessCategory.AUTHENTICATED: AccessPermission.READ,
+            AccessCategory.TEAM: AccessPermission.EDIT,
+            AccessCategory.AUTHOR: AccessPermission.EDIT
+        }
+        access = 0
+        for category, permission in self.factory_category_permission.items():
+            access |= get_access_bits(category, permission)
+        # Enough rows for the planner to prefer reading the page from an index over sorting
+        author = CustomUserFactory()
+        self.posts = Post.objects.bulk_create([
+            Post(title=f"Post {index}", content=CONTENT_MOCK, user=author, access=access) for index in range(300)
+        ])
+        users = CustomUser.objects.bulk_create([
+            CustomUser(email=f"user{index}@example.com", team=self.team) for index in range(300)
+        ])
+        Like.objects.bulk_create(
+            [Like(post=self.posts[0], user=user, is_active=index % 2 == 0) for index, user in enumerate(users)] +
+            [Like(post=post, user=self.user, is_active=index % 2 == 0) for index, post in enumerate(self.posts)]
+        )
+
+    def test_likes_of_a_post_are_read_from_the_active_post_index(self):
+        # Act
+        queries = self.get_request_queries(self.url, {'post': self.posts[0].id})
+        # Assert
+        page_query = self.get_query_on(queries, 'like_like', 'LIMIT')
+        self.assertQueryUsesIndex(page_query, 'like_active_post_idx')
+
+    def test_likes_of_a_user_are_read_from_the_active_user_index(self):
+        # Act
+        queries = self.get_request_queries(self.url, {'user': self.user.id})
+        # Assert
+        page_query = self.get_query_on(queries, 'like_like', 'LIMIT')
+        self.assertQueryUsesIndex(page_query, 'like_active_user_idx')
+
+class LikeNPlusOneQueryViewTests(NPlusOneQueryTestMixin, APITestCase):
+
+    def setUp(self):
+        self.user = CustomUserFactory()
+        CategoryFactory.create_batch()
+        PermissionFactory.create_batch()
+        self.post = PostFactory()
+        PostCategoryPermissionFactory.create(post=self.post, category_permission=DEFAULT_ACCESS_CONTROL)
+        # Every like has a different author on a different team
+        LikeFactory.create_batch(12, post=self.post)
+        self.url = reverse('like-list-create')
+
+    def test_unauthenticated_user_list_does_not_query_per_like(self):
+        # Act
+        # Assert
+        self.assertNoNPlusOneQueries(self.url, {'post': self.post.id})
+
+    def test_authenticated_user_list_does_not_query_per_like(self):
+        # Arrange
+        self.client.force_authenticate(self.user)
+        # Act
+        # Assert
+        self.assertNoNPlusOneQueries(self.url, {'post': self.post.id})
+        self.assertNoNPlusOneQueries(self.url, {'post': self.post.id, 'pagination': 'cursor'})
+
+class LikeBulkViewTests(APITestCase):
+
+    def setUp(self):
+        self.team = TeamFactory()
+        self.user = CustomUserFactory(team=self.team)
+        self.client.force_authenticate(self.user)
+        CategoryFactory.create_batch()
+        PermissionFactory.create_batch()
+        self.posts = PostFactory.create_batch(4)
+        PostCategoryPermissionFactory.create_batch(self.posts, category_permission=DEFAULT_ACCESS_CONTROL)
+        self.post_ids = [post.id for post in self.posts]
+        self.url = reverse('like-bulk')
+
+    def get_like_counts(self):
+        return list(Post.objects.filter(id__in=self.post_ids).order_by('id').values_list('like_count', flat=True))
+
+    def test_authenticated_user_can_like_many_posts_and_the_counters_are_updated(self):
+        # Act
+        response = self.client.post(self.url, {'posts': self.post_ids}, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get('changed'), self.post_ids)
+        self.assertEqual(Like.objects.filter(user=self.user, is_active=True).count(), len(self.post_ids))
+        self.assertEqual(self.get_like_counts(), [1, 1, 1, 1])
+
+    def test_inactive_likes_are_reactivated_and_active_likes_are_left_untouched(self):
+        # Arrange
+        active_like = LikeFactory(user=self.user, post=self.posts[0])
+        inactive_like = LikeFactory(user=self.user, post=self.posts[1])
+        inactive_like.is_active = False
+        inactive_like.save()
+        # Act
+        response = self.client.post(self.url, {'posts': self.post_ids}, format='json')
+        # Assert
+        inactive_like.refresh_from_db()
+        self.assertEqual(response.data.get('changed'), self.post_ids[1:])
+        self.assertTrue(inactive_like.is_active)
+        self.assertEqual(Like.objects.filter(user=self.user).count(), len(self.post_ids))
+        self.assertEqual(Like.objects.get(id=active_like.id).last_modified, active_like.last_modified)
+        self.assertEqual(self.get_like_counts(), [1, 1, 1, 1])
+
+    def test_authenticated_user_can_unlike_many_posts_and_the_counters_are_updated(self):
+        # Arrange
+        for post in self.posts[:3]:
+            LikeFactory(user=self.user, post=post)
+        # Act
+        response = self.client.post(self.url, {'posts': self.post_ids, 'is_active': False}, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get('changed'), self.post_ids[:3])
+        self.assertFalse(Like.objects.filter(user=self.user, is_active=True).exists())
+        self.assertEqual(Like.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(self.get_like_counts(), [0, 0, 0, 0])
+
+    def test_posts_the_user_can_not_read_are_not_liked_and_returned_as_not_found(self):
+        # Arrange
+        private_post = PostFactory()
+        PostCategoryPermissionFactory.create_batch([private_post], category_permission={
+            AccessCategory.PUBLIC: AccessPermission.NO_PERMISSION,
+            AccessCategory.AUTHENTICATED: AccessPermission.NO_PERMISSION,
+            AccessCategory.TEAM: AccessPermission.NO_PERMISSION,
+            AccessCategory.AUTHOR: AccessPermission.EDIT,
+        })
+        missing_post_id = private_post.id + 1000
+        # Act
+        response = self.client.post(self.url, {'posts': self.post_ids + [private_post.id, missing_post_id]}, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get('posts'), self.post_ids)
+        self.assertEqual(response.data.get('not_found'), [private_post.id, missing_post_id])
+        self.assertFalse(Like.objects.filter(post=private_post).exists())
+
+    def test_likes_are_removed_from_posts_the_user_can_no_longer_read(self):
+        # Arrange
+        liked_post = self.posts[0]
+        LikeFactory(user=self.user, post=liked_post)
+        # The read access of every category is revoked after the like
+        Post.objects.filter(id=liked_post.id).update(access=0)
+        # Act
+        response = self.client.post(self.url, {'posts': [liked_post.id, self.post_ids[1]], 'is_active': False}, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get('posts'), [liked_post.id, self.post_ids[1]])
+        self.assertEqual(response.data.get('changed'), [liked_post.id])
+        self.assertFalse(Like.objects.filter(user=self.user, is_active=True).exists())
+        self.assertEqual(self.get_like_counts(), [0, 0, 0, 0])
+
+    @skipUnless(connection.vendor == 'postgresql', "The other vendors run the ORM fallback of the upsert")
+    def test_posts_are_liked_with_a_constant_number_of_queries(self):
+        # Act
+        # Readable posts, savepoint, upsert, counters, release
+        with self.assertNumQueries(5):
+            self.client.post(self.url, {'posts': self.post_ids[:1]}, format='json')
+        with self.assertNumQueries(5):
+            response = self.client.post(self.url, {'posts': self.post_ids[1:]}, format='json')
+        # Assert
+        self.assertEqual(response.data.get('changed'), self.post_ids[1:])
+
+    def test_an_empty_list_of_posts_returns_400(self):
+        # Act
+        response = self.client.post(self.url, {'posts': []}, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unauthenticated_user_can_not_like_posts_in_bulk_and_403_is_returned(self):
+        # Arrange
+        self.client.force_authenticate(None)
+        # Act
+        response = self.client.post(self.url, {'posts': self.post_ids}, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Like.objects.exists())
+
+class LikeCreateUpsertViewTests(APITestCase):
+
+    def setUp(self):
+        self.team = TeamFactory()
+        self.user = CustomUserFactory(team=self.team)
+        self.client.force_authenticate(self.user)
+        CategoryFactory.create_batch()
+        PermissionFactory.create_batch()
+        self.post = PostFactory()
+        PostCategoryPermissionFactory(post=self.post, category_permission=DEFAULT_ACCESS_CONTROL)
+        self.data = {'user': self.user.id, 'post': self.post.id}
+        self.url = reverse('like-list-create')
+
+    @skipUnless(connection.vendor == 'postgresql', "The other vendors run the ORM fallback of the upsert")
+    def test_a_like_is_written_with_a_single_upsert_and_without_reading_the_likes(self):
+        # Arrange
+        like = LikeFactory(user=self.user, post=self.post)
+        like.is_active = False
+        like.save()
+        # Act
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, self.data)
+        # Assert
+        queries = [query['sql'] for query in context.captured_queries]
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data.get('id'), like.id)
+        self.assertEqual(len([sql for sql in queries if 'INSERT INTO "like_like"' in sql or 'UPDATE "like_like"' in sql]), 1)
+        self.assertFalse([sql for sql in queries if sql.startswith('SELECT') and 'FROM "like_like"' in sql])
+        self.assertEqual(Post.objects.get(id=self.post.id).like_count, 1)
+
+    def test_liking_a_post_twice_returns_400_and_the_counter_is_not_changed(self):
+        # Arrange
+        self.client.post(self.url, self.data)
+        # Act
+        response = self.client.post(self.url, self.data)
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['non_field_errors'][0].code, 'unique')
+        self.assertEqual(Post.objects.get(id=self.post.id).like_count, 1)
+
+
+@skipUnless(connection.vendor == 'postgresql', "Only the upsert ignores the concurrent likes of the same post")
+class LikeConcurrentCreateViewTests(APITransactionTestCase):
+
+    THREADS = 8
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUserFactory(team=TeamFactory())
+        CategoryFactory.create_batch()
+        PermissionFactory.create_batch()
+        self.post = PostFactory()
+        PostCategoryPermissionFactory(post=self.post, category_permission=DEFAULT_ACCESS_CONTROL)
+        self.url = reverse('like-list-create')
+
+    def like_concurrently(self):
+        # Every thread has its own database connection and sends its like at the same time
+        barrier = threading.Barrier(self.THREADS)
+        status_codes = []
+
+        def like():
+            client = APIClient()
+            client.force_authenticate(self.user)
+            try:
+                barrier.wait()
+                response = client.post(self.url, {'user': self.user.id, 'post': self.post.id})
+                status_codes.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=like) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sorted(status_codes)
+
+    def test_concurrent_likes_of_the_same_user_create_a_single_like(self):
+        # Act
+        status_codes = self.like_concurrently()
+        # Assert
+        self.assertEqual(status_codes, [status.HTTP_201_CREATED] + [status.HTTP_400_BAD_REQUEST] * (self.THREADS - 1))
+        self.assertEqual(Like.objects.filter(user=self.user, post=self.post).count(), 1)
+        self.assertEqual(Post.objects.get(id=self.post.id).like_count, 1)
+
+    def test_concurrent_likes_of_the_same_user_reactivate_a_deleted_like_once(self):
+        # Arrange
+        like = LikeFactory(user=self.user, post=self.post)
+        like.is_active = False
+        like.save()
+        # Act
+        status_codes = self.like_concurrently()
+        # Assert
+        self.assertEqual(status_codes, [status.HTTP_201_CREATED] + [status.HTTP_400_BAD_REQUEST] * (self.THREADS - 1))
+        self.assertTrue(Like.objects.get(id=like.id).is_active)
+        self.assertEqual(Post.objects.get(id=self.post.id).like_count, 1)
+
+
+class LikeBulkDeleteViewTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUserFactory()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('like-bulk-delete')
+        self.posts = PostFactory.create_batch(3)
+        self.likes = [LikeFactory(user=self.user, post=post) for post in self.posts]
+
+    def test_bulk_delete_deactivates_the_likes_of_the_user_and_updates_the_counters(self):
+        # Arrange
+        other_like = LikeFactory(post=self.posts[0])
+        # Act
+        response = self.client.post(self.url, {'user': self.user.id}, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'deactivated': 3, 'remaining': 0})
+        self.assertFalse(Like.objects.filter(user=self.user, is_active=True).exists())
+        self.assertTrue(Like.objects.get(id=other_like.id).is_active)
+        like_counts = dict(Post.objects.values_list('id', 'like_count'))
+        self.assertEqual(like_counts, {self.posts[0].id: 1, self.posts[1].id: 0, self.posts[2].id: 0})
+
+    def test_bulk_delete_updates_every_batch_with_a_constant_number_of_queries(self):
+        # Arrange
+        LikeFactory.create_batch(5, user=self.user)
+        # Act
+        with CaptureQueriesContext(connection) as context:
+            deactivated = list(Like.bulk_deactivate(batch_size=3, user_id=self.user.id))
+        # Assert
+        updates = [query['sql'] for query in context.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(deactivated, [3, 3, 2])
+        # One update of the likes and one of the counters per batch
+        self.assertEqual(len(updates), 6)
+        self.assertEqual(Post.objects.filter(like_count__gt=0).count(), 0)
+
+    def test_bulk_delete_runs_at_most_max_batches_and_reports_the_remaining_likes(self):
+        # Act
+        with patch.object(BulkDeleteLikeView, 'batch_size', 2), patch.object(BulkDeleteLikeView, 'max_batches', 1):
+            first_response = self.client.post(self.url, {'user': self.user.id}, format='json')
+            second_response = self.client.post(self.url, {'user': self.user.id}, format='json')
+        # Assert
+        self.assertEqual(first_response.data, {'deactivated': 2, 'remaining': 1})
+        self.assertEqual(second_response.data, {'deactivated': 1, 'remaining': 0})
+        self.assertFalse(Like.objects.filter(user=self.user, is_active=True).exists())
+
+    def test_bulk_delete_of_a_post_by_a_user_only_deactivates_the_likes_of_the_user(self):
+        # Arrange
+        other_like = LikeFactory(post=self.posts[0])
+        # Act
+        response = self.client.post(self.url, {'post': self.posts[0].id}, format='json')
+        # Assert
+        self.assertEqual(response.data, {'deactivated': 1, 'remaining': 0})
+        self.assertFalse(Like.objects.get(id=self.likes[0].id).is_active)
+        self.assertTrue(Like.objects.get(id=other_like.id).is_active)
+        self.assertEqual(Post.objects.get(id=self.posts[0].id).like_count, 1)
+
+    def test_bulk_delete_of_a_post_by_an_admin_deactivates_every_like_of_the_post(self):
+        # Arrange
+        admin = CustomUserFactory(is_staff=True)
+        self.client.force_authenticate(admin)
+        LikeFactory.create_batch(2, post=self.posts[0])
+        # Act
+        response = self.client.post(self.url, {'post': self.posts[0].id}, format='json')
+        # Assert
+        self.assertEqual(response.data, {'deactivated': 3, 'remaining': 0})
+        self.assertEqual(Post.objects.get(id=self.posts[0].id).like_count, 0)
+
+    def test_bulk_delete_of_another_user_is_rejected_for_non_admin_users(self):
+        # Arrange
+        other_user = CustomUserFactory()
+        LikeFactory(user=other_user, post=self.posts[0])
+        # Act
+        response = self.client.post(self.url, {'user': other_user.id}, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Like.objects.filter(user=other_user, is_active=True).exists())
+
+    def test_bulk_delete_requires_a_user_or_a_post(self):
+        # Act
+        response = self.client.post(self.url, {}, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Like.objects.filter(is_active=True).count(), 3)
+
+    def test_bulk_delete_expires_the_cached_like_lists(self):
+        # Arrange
+        self.client.force_authenticate(None)
+        list_url = reverse('like-list-create')
+        self.client.get(list_url)
+        self.client.force_authenticate(self.user)
+        # Act
+        self.client.post(self.url, {'user': self.user.id}, format='json')
+        self.client.force_authenticate(None)
+        response = self.client.get(list_url)
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 0)
+
+    def test_bulk_delete_by_an_anonymous_user_is_rejected(self):
+        # Arrange
+        self.client.force_authenticate(None)
+        # Act
+        response = self.client.post(self.url, {'user': self.user.id}, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Like.objects.filter(is_active=True).count(), 3)
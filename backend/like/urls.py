@@ -3,6 +3,8 @@ from . import views
 
 urlpatterns = [
     path('', views.ListCreateLikeView.as_view(), name="like-list-create"),
+    path('bulk/', views.BulkLikeView.as_view(), name="like-bulk"),
+    path('bulk-delete/', views.BulkDeleteLikeView.as_view(), name="like-bulk-delete"),
     path('<int:user>/<int:post>/', views.DeleteLikeView.as_view(), name="like-delete"),
 ]
 
@@ -1,21 +1,28 @@
-from rest_framework.generics import ListCreateAPIView, DestroyAPIView, get_object_or_404
+from rest_framework.generics import GenericAPIView, ListCreateAPIView, DestroyAPIView, get_object_or_404
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, SAFE_METHODS
+from rest_framework.response import Response
 from django_filters import rest_framework as filters
 from like.models import Like
-from like.serializers import LikeCreateSerializer, LikeListSerializer, LikeDeleteSerializer
-from common.paginator import TwentyResultsSetPagination
-from common.mixins import DestroyMixin, PerformCreateMixin, GetQuerysetByPermissionsMixin
+from like.serializers import LikeBulkSerializer, LikeCreateSerializer, LikeListSerializer, LikeDeleteSerializer
+from post.models import Post
+from common.paginator import TwentyResultsSetCachedCountPagination, TwentyResultsSetCursorPagination
+from common.constants import CacheNamespace
+from common.serializers import BulkDeactivateSerializer
+from common.mixins import BulkDeactivateMixin, CursorPaginationMixin, DestroyMixin, PerformCreateMixin, GetQuerysetByPermissionsMixin
 
 
-class ListCreateLikeView(PerformCreateMixin, ListCreateAPIView, GetQuerysetByPermissionsMixin):
+class ListCreateLikeView(PerformCreateMixin, CursorPaginationMixin, ListCreateAPIView, GetQuerysetByPermissionsMixin):
 
     permission_classes = [IsAuthenticatedOrReadOnly]
-    pagination_class = TwentyResultsSetPagination
+    pagination_class = TwentyResultsSetCachedCountPagination
+    cursor_pagination_class = TwentyResultsSetCursorPagination
+    cache_namespaces = (CacheNamespace.POST, CacheNamespace.LIKE)
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_fields = ('post', 'user')
     
     def get_queryset(self): 
-        return self.get_queryset_by_permissions(Like, is_post_related=True)
+        # The list serializer nests the user with its team
+        return self.get_queryset_by_permissions(Like, is_post_related=True).select_related('user__team')
 
     def get_object(self):
         queryset = self.get_queryset()
@@ -51,3 +58,33 @@ class DeleteLikeView(DestroyMixin, DestroyAPIView):
         obj = get_object_or_404(queryset, **filter_kwargs)
         return obj
 
+
+class BulkLikeView(GenericAPIView, GetQuerysetByPermissionsMixin):
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = LikeBulkSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        post_ids = set(serializer.validated_data['posts'])
+        is_active = serializer.validated_data['is_active']
+        # The posts the user can read, resolved in one query instead of a check per post
+        readable_posts = self.get_queryset_by_permissions(Post, read_only=True).filter(id__in=post_ids)
+        target_post_ids = set(readable_posts.values_list('id', flat=True))
+        if not is_active:
+            # As in DeleteLikeView, the user removes its own likes even from posts it can no longer read
+            liked_posts = Like.objects.filter(user=request.user, post_id__in=post_ids - target_post_ids, is_active=True)
+            target_post_ids |= set(liked_posts.values_list('post_id', flat=True))
+        changed_post_ids = Like.bulk_set_active(request.user.id, target_post_ids, is_active)
+        return Response({
+            'posts': sorted(target_post_ids),
+            'changed': changed_post_ids,
+            'not_found': sorted(post_ids - target_post_ids),
+        })
+
+class BulkDeleteLikeView(BulkDeactivateMixin, GenericAPIView):
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = BulkDeactivateSerializer
+    model = Like
@@ -2,6 +2,7 @@ from django.test import TestCase
 from permission.models import Permission
 from permission.tests.factories import PermissionFactory
 from common.constants import AccessPermission
+from common.registry import get_permission_id
 
 # Create your tests here.
 class PermissionModelTests(TestCase):
@@ -31,4 +32,12 @@ class PermissionModelTests(TestCase):
         self.assertEqual(permissions[0].name, AccessPermission.READ)
         self.assertEqual(permissions[1].name, AccessPermission.EDIT)
         self.assertEqual(permissions[2].name, AccessPermission.NO_PERMISSION)
-        
\ No newline at end of file
+        
+    def test_the_registry_is_reloaded_when_a_permission_is_deleted(self):
+        # Arrange
+        permission = PermissionFactory(name='Test Permission')
+        get_permission_id('Test Permission')
+        # Act
+        permission.delete()
+        # Assert
+        self.assertIsNone(get_permission_id('Test Permission'))
@@ -0,0 +1,76 @@
+from heapq import merge
+from django.core.cache import cache
+from django.db.models import F, Q
+from django.db.models.lookups import GreaterThan
+from common.cache import get_cache_versions
+from common.constants import AccessCategory, AccessBit, CacheNamespace, TEAM_FEED_CACHE_TIMEOUT, TEAM_FEED_CACHE_MAX_POSTS
+from common.utils import get_access_mask
+from post.models import Post
+
+
+def _has_read_access(categories):
+    return GreaterThan(F('access').bitand(get_access_mask(categories, AccessBit.READ)), 0)
+
+def get_team_feed(team_id):
+    """
+    Get the posts that every member of a team can read, without the author only access.
+
+    The feed is cached per team as a list of (created_at, id) pairs in the post ordering, and it
+    is invalidated by post and permission writes and by users changing of team.
+
+    Args:
+        team_id: The team of the users reading the feed.
+
+    Returns:
+        The list of (created_at, id) pairs, or None when the feed is too large to be cached.
+    """
+    versions = get_cache_versions((CacheNamespace.POST, CacheNamespace.TEAM))
+    cache_key = f"team-feed:{versions}:{team_id}"
+    team_feed = cache.get(cache_key)
+    if team_feed is False:
+        # The feed was too large to be cached, skip reading it again until it expires
+        return None
+    if team_feed is not None:
+        return team_feed
+
+    same_team_conditions = Q(user__team=team_id) & _has_read_access([AccessCategory.TEAM])
+    different_team_conditions = ~Q(user__team=team_id) & _has_read_access([AccessCategory.PUBLIC, AccessCategory.AUTHENTICATED])
+    team_posts = (
+        Post.objects.filter(same_team_conditions | different_team_conditions)
+        .order_by('-created_at', '-id')
+        .values_list('created_at', 'id')
+    )
+    team_feed = list(team_posts[:TEAM_FEED_CACHE_MAX_POSTS + 1])
+    if len(team_feed) > TEAM_FEED_CACHE_MAX_POSTS:
+        cache.set(cache_key, False, TEAM_FEED_CACHE_TIMEOUT)
+        return None
+    cache.set(cache_key, team_feed, TEAM_FEED_CACHE_TIMEOUT)
+    return team_feed
+
+def get_user_feed_post_ids(user):
+    """
+    Get the ids of the posts a user can read, merging the team feed with the posts of the user.
+
+    The posts of the user are only readable through the author access, so they are removed
+    from the team feed and added back when they have author read access.
+
+    Args:
+        user: The authenticated, non staff, user.
+
+    Returns:
+        The list of post ids in the post ordering, or None when the team feed is not cached.
+    """
+    team_feed = get_team_feed(user.team_id)
+    if team_feed is None:
+        return None
+
+    owner_posts = list(
+        Post.objects.filter(user=user.id)
+        .order_by('-created_at', '-id')
+        .values_list('created_at', 'id', 'access')
+    )
+    owner_post_ids = {post_id for _, post_id, _ in owner_posts}
+    author_read_mask = get_access_mask([AccessCategory.AUTHOR], AccessBit.READ)
+    owner_feed = [(created_at, post_id) for created_at, post_id, access in owner_posts if access & author_read_mask]
+    team_feed = [(created_at, post_id) for created_at, post_id in team_feed if post_id not in owner_post_ids]
+    return [post_id for _, post_id in merge(team_feed, owner_feed, reverse=True)]
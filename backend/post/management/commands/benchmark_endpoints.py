@@ -0,0 +1,239 @@
+import json
+import math
+import subprocess
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.lookups import GreaterThan
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from comment.models import Comment
+from common.constants import AccessBit, AccessCategory
+from common.metrics import QueryRecorder
+from common.utils import get_access_mask
+from like.models import Like
+from post.models import Post
+from user.models import CustomUser
+
+USER_CLASSES = ('anonymous', 'owner', 'same_team', 'other_team', 'staff')
+
+
+def get_percentile(samples, percentile):
+    # Nearest rank percentile of the sorted samples
+    rank = max(1, math.ceil(percentile / 100 * len(samples)))
+    return samples[rank - 1]
+
+def get_client():
+    # The default host of the test client is not in ALLOWED_HOSTS outside the test runner
+    host = next((host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')), 'localhost')
+    return Client(HTTP_HOST=host)
+
+def send_request(client, method, path, data):
+    if method == 'get':
+        return client.get(path, data)
+    return getattr(client, method)(path, data, content_type='application/json')
+
+def get_git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the API endpoints for every user class against the seeded dataset and save the "
+        "results as JSON. Likes are created and deleted and posts are updated, so run it against a "
+        "disposable database seeded with generate_dataset, Postgres or SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help="Measured requests per endpoint and user class")
+        parser.add_argument('--warmup', type=int, default=5, help="Unmeasured requests per endpoint and user class")
+        parser.add_argument('--password', default='password', help="Password of the seeded users, used by the login endpoint")
+        parser.add_argument('--cold-cache', action='store_true', help="Clear the cache before every request")
+        parser.add_argument('--output', default='benchmark-results.json', help="File where the results are saved")
+        parser.add_argument('--compare', help="Previous results file to compare the latencies with")
+
+    def handle(self, *args, **options):
+        self.options = options
+        # A public post editable by its author, so every user class reaches every endpoint
+        readable_by_anyone = GreaterThan(F('access').bitand(get_access_mask([AccessCategory.PUBLIC], AccessBit.READ)), 0)
+        editable_by_author = GreaterThan(F('access').bitand(get_access_mask([AccessCategory.AUTHOR], AccessBit.EDIT)), 0)
+        post = (
+            Post.objects.filter(readable_by_anyone, editable_by_author, user__is_staff=False)
+            .order_by('-like_count', '-comment_count', '-id')
+            .first()
+        )
+        if post is None:
+            raise CommandError("There are no posts to benchmark, seed the database with generate_dataset first")
+        users = self.get_users(post.user)
+
+        results = []
+        for user_class in USER_CLASSES:
+            user = users.get(user_class)
+            if user_class != 'anonymous' and user is None:
+                self.stdout.write(self.style.WARNING(f"-- Skipping {user_class}, there is no such user in the dataset"))
+                continue
+            client = get_client()
+            if user is not None:
+                client.force_login(user)
+            for name, method, path, data in self.get_scenarios(post, user):
+                results.append(self.run_scenario(client, user_class, name, [(method, path, data)]))
+            if user is not None:
+                results += self.run_like_scenarios(client, user_class, user, post)
+        results.append(self.run_scenario(get_client(), 'anonymous', 'user-login', [(
+            'post', reverse('login'), {'email': users['owner'].email, 'password': options['password']}
+        )]))
+
+        report = {
+            'commit': get_git_commit(),
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'cold_cache': options['cold_cache'],
+            'dataset': {
+                'users': CustomUser.objects.count(),
+                'posts': Post.objects.count(),
+                'likes': Like.objects.count(),
+                'comments': Comment.objects.count(),
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+        self.write_summary(results)
+        if options['compare']:
+            self.write_comparison(results, options['compare'])
+        self.stdout.write(self.style.SUCCESS(f"Saved {len(results)} results to {options['output']}"))
+
+    def get_users(self, owner):
+        users = CustomUser.objects.filter(is_staff=False).exclude(id=owner.id).order_by('id')
+        return {
+            'owner': owner,
+            'same_team': users.filter(team_id=owner.team_id).first(),
+            'other_team': users.exclude(team_id=owner.team_id).first(),
+            'staff': CustomUser.objects.filter(is_staff=True).order_by('id').first(),
+        }
+
+    def get_scenarios(self, post, user):
+        post_url = reverse('post-retrieve-update-delete', args=[post.id])
+        scenarios = [
+            ('post-list', 'get', reverse('post-list-create'), None),
+            ('post-list-cursor', 'get', reverse('post-list-create'), {'pagination': 'cursor'}),
+            ('post-retrieve', 'get', post_url, None),
+            ('like-list', 'get', reverse('like-list-create'), {'post': post.id}),
+            ('comment-list', 'get', reverse('comment-list-create'), {'post': post.id}),
+        ]
+        if user is not None:
+            # Rewrites the same title, users without edit access measure the rejection
+            scenarios.append(('post-update', 'patch', post_url, {'title': post.title}))
+        return scenarios
+
+    def run_like_scenarios(self, client, user_class, user, post):
+        # Likes and deletes alternate so every request succeeds and the like ends as it started
+        create = ('post', reverse('like-list-create'), {'user': user.id, 'post': post.id})
+        delete = ('delete', reverse('like-delete', args=[user.id, post.id]), None)
+        liked = Like.objects.filter(user=user, post=post, is_active=True).exists()
+        steps = [delete, create] if liked else [create, delete]
+        return [
+            self.run_scenario(client, user_class, name, steps, measured_step=index)
+            for index, name in enumerate(('like-delete', 'like-create') if liked else ('like-create', 'like-delete'))
+        ]
+
+    def run_scenario(self, client, user_class, name, steps, measured_step=0):
+        """
+        Run the steps of a scenario repeatedly and measure one of them.
+
+        Args:
+            client: The client authenticated as the user class.
+            user_class: The name of the user class.
+            name: The name of the measured endpoint.
+            steps: The (method, path, data) requests executed in every repetition.
+            measured_step: The index of the measured step.
+
+        Returns:
+            The latency percentiles, queries, database time and rows scanned of the measured step.
+        """
+        latencies = []
+        queries = []
+        db_times = []
+        rows_scanned = []
+        statuses = {}
+        for repetition in range(self.options['warmup'] + self.options['requests']):
+            for index, (method, path, data) in enumerate(steps):
+                if self.options['cold_cache']:
+                    cache.clear()
+                recorder = QueryRecorder()
+                # Statistics are not flushed inside a transaction, so the difference belongs to the request
+                with transaction.atomic():
+                    scanned_before = self.get_rows_scanned()
+                    with connection.execute_wrapper(recorder):
+                        start = time.perf_counter()
+                        response = send_request(client, method, path, data)
+                        latency = time.perf_counter() - start
+                    scanned_after = self.get_rows_scanned()
+                if index != measured_step or repetition < self.options['warmup']:
+                    continue
+                latencies.append(latency * 1000)
+                queries.append(recorder.queries)
+                db_times.append(recorder.duration * 1000)
+                rows_scanned.append(None if scanned_before is None else scanned_after - scanned_before)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        latencies.sort()
+        method, path, _ = steps[measured_step]
+        return {
+            'endpoint': name,
+            'user_class': user_class,
+            'method': method.upper(),
+            'path': path,
+            'requests': len(latencies),
+            'status_codes': {str(code): count for code, count in statuses.items()},
+            'p50_ms': round(get_percentile(latencies, 50), 3),
+            'p95_ms': round(get_percentile(latencies, 95), 3),
+            'p99_ms': round(get_percentile(latencies, 99), 3),
+            'mean_ms': round(sum(latencies) / len(latencies), 3),
+            'queries': max(queries),
+            'db_ms': round(sum(db_times) / len(db_times), 3),
+            'rows_scanned': None if None in rows_scanned else max(rows_scanned),
+        }
+
+    def get_rows_scanned(self):
+        # Rows read by sequential and index scans of this connection not yet flushed to the statistics, PostgreSQL only
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COALESCE(SUM(seq_tup_read + COALESCE(idx_tup_fetch, 0)), 0) FROM pg_stat_xact_user_tables"
+            )
+            return int(cursor.fetchone()[0])
+
+    def write_summary(self, results):
+        self.stdout.write(f"{'endpoint':<18} {'user class':<11} {'status':<10} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'rows':>9}")
+        for result in results:
+            self.stdout.write(
+                f"{result['endpoint']:<18} {result['user_class']:<11} {','.join(result['status_codes']):<10} "
+                f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+                f"{result['queries']:>8} {result['rows_scanned'] if result['rows_scanned'] is not None else '-':>9}"
+            )
+
+    def write_comparison(self, results, previous_path):
+        with open(previous_path) as previous_file:
+            previous_report = json.load(previous_file)
+        previous_results = {(result['endpoint'], result['user_class']): result for result in previous_report['results']}
+        self.stdout.write(f"Compared with {previous_report.get('commit') or previous_path}")
+        for result in results:
+            previous = previous_results.get((result['endpoint'], result['user_class']))
+            if previous is None:
+                continue
+            change = (result['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100 if previous['p95_ms'] else 0
+            self.stdout.write(
+                f"{result['endpoint']:<18} {result['user_class']:<11} p95 {previous['p95_ms']:>9.2f} -> {result['p95_ms']:>9.2f} "
+                f"({change:+.1f}%) queries {previous['queries']} -> {result['queries']}"
+            )
@@ -0,0 +1,47 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from comment.models import Comment
+from common.constants import BULK_DEACTIVATE_BATCH_SIZE
+from like.models import Like
+
+MODELS = {'like': Like, 'comment': Comment}
+
+
+class Command(BaseCommand):
+    help = (
+        "Deactivate the likes and comments of a user, of a post, or of a user in a post with set-based "
+        "updates in batches. The post counters and the cache are updated once per batch, and an "
+        "interrupted run is resumed by the next one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help="Id of the user whose rows are deactivated")
+        parser.add_argument('--post', type=int, help="Id of the post whose rows are deactivated")
+        parser.add_argument('--models', nargs='+', choices=MODELS, default=list(MODELS), help="Models to deactivate")
+        parser.add_argument('--batch-size', type=int, default=BULK_DEACTIVATE_BATCH_SIZE, help="Rows deactivated per statement")
+        parser.add_argument('--sleep', type=float, default=0.1, help="Seconds to pause before the next batch")
+
+    def handle(self, *args, **options):
+        filters = {f"{field}_id": options[field] for field in ('user', 'post') if options[field] is not None}
+        if not filters:
+            raise CommandError("A --user or a --post is required")
+        for name in options['models']:
+            self.deactivate(name, MODELS[name], filters, options['batch_size'], options['sleep'])
+
+    def deactivate(self, name, model, filters, batch_size, sleep):
+        start = time.perf_counter()
+        deactivated = 0
+        batches = 0
+        for batch_deactivated in model.bulk_deactivate(batch_size=batch_size, **filters):
+            deactivated += batch_deactivated
+            batches += 1
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"-- Batch {batches}: {deactivated} {name}s deactivated, {deactivated / elapsed:.0f} rows/s")
+            # A smaller batch was the last one
+            if batch_deactivated == batch_size:
+                time.sleep(sleep)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Deactivated {deactivated} {name}s in {batches} batches and {elapsed:.2f} s"
+        ))
+        return deactivated
@@ -0,0 +1,249 @@
+import random
+from datetime import datetime, timedelta, timezone
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from category.models import Category
+from comment.models import Comment
+from common.cache import invalidate_cache
+from common.constants import (
+    CATEGORIES, CONTENT_MOCK, EXCERPT_LENGTH, PERMISSIONS, AccessCategory, AccessPermission, CacheNamespace
+)
+from common.registry import get_category_id, get_permission_id
+from common.utils import get_access_bits
+from like.models import Like
+from permission.models import Permission
+from post.models import Post, PostCategoryPermission
+from team.models import Team
+from user.models import CustomUser
+
+# Weights of the permission of every category, most posts are shared with the team and only a
+# few are editable by anyone
+ACCESS_DISTRIBUTION = {
+    AccessCategory.PUBLIC: {AccessPermission.NO_PERMISSION: 50, AccessPermission.READ: 40, AccessPermission.EDIT: 10},
+    AccessCategory.AUTHENTICATED: {AccessPermission.NO_PERMISSION: 30, AccessPermission.READ: 55, AccessPermission.EDIT: 15},
+    AccessCategory.TEAM: {AccessPermission.NO_PERMISSION: 15, AccessPermission.READ: 35, AccessPermission.EDIT: 50},
+    AccessCategory.AUTHOR: {AccessPermission.READ: 10, AccessPermission.EDIT: 90},
+}
+# Share of likes and comments that were soft deleted
+INACTIVE_RATIO = 0.1
+# The dates are spread back from a fixed anchor, so two runs with the same seed are identical
+DEFAULT_END_DATE = '2024-01-01T00:00:00+00:00'
+WORDS = CONTENT_MOCK.replace(',', '').replace('.', '').split()
+
+
+def reserve_ids(model, amount):
+    # COPY can not return the generated ids, so they are taken from the sequence beforehand
+    if connection.vendor != 'postgresql':
+        # Without sequences the ids follow the highest one, the command is the only writer
+        start = (model.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+        return list(range(start, start + amount))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+            [model._meta.db_table, amount],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+def copy_rows(model, field_names, rows):
+    # COPY streams the rows without building and parsing a huge INSERT statement
+    if connection.vendor != 'postgresql':
+        return insert_rows(model, field_names, rows)
+    quote_name = connection.ops.quote_name
+    columns = ', '.join(quote_name(model._meta.get_field(name).column) for name in field_names)
+    with connection.cursor() as cursor:
+        with cursor.copy(f"COPY {quote_name(model._meta.db_table)} ({columns}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+
+def insert_rows(model, field_names, rows):
+    # Other vendors run one INSERT per row with executemany. bulk_create would replace the dates with
+    # auto_now, so the values are prepared by their fields as the ORM does
+    if not rows:
+        return
+    quote_name = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in field_names]
+    columns = ', '.join(quote_name(field.column) for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {quote_name(model._meta.db_table)} ({columns}) VALUES ({placeholders})",
+            [[field.get_db_prep_value(value, connection) for field, value in zip(fields, row)] for row in rows],
+        )
+
+def parse_date(value):
+    date = datetime.fromisoformat(value)
+    return date if date.tzinfo else date.replace(tzinfo=timezone.utc)
+
+def get_skewed_weights(amount):
+    # A few teams hold most users and a few users write most posts
+    cumulative_weights = []
+    total = 0
+    for rank in range(amount):
+        total += 1 / (rank + 1)
+        cumulative_weights.append(total)
+    return cumulative_weights
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic dataset of teams, users, posts, likes and comments, deterministic by seed. "
+        "Postgres loads the rows with COPY, the other databases, such as SQLite, with batched INSERTs."
+    )
+
+    POST_FIELDS = (
+        'id', 'title', 'content', 'excerpt', 'user', 'access', 'like_count', 'comment_count', 'created_at', 'last_modified'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teams', type=int, default=100, help="Teams to create")
+        parser.add_argument('--users', type=int, default=10000, help="Users to create")
+        parser.add_argument('--staff', type=int, default=1, help="Staff users to create, they do not write posts")
+        parser.add_argument('--posts', type=int, default=100000, help="Posts to create")
+        parser.add_argument('--likes', type=int, default=1000000, help="Approximate likes to create")
+        parser.add_argument('--comments', type=int, default=1000000, help="Approximate comments to create")
+        parser.add_argument('--days', type=int, default=365, help="Days over which the posts are spread")
+        parser.add_argument(
+            '--end-date', type=parse_date, default=parse_date(DEFAULT_END_DATE),
+            help="ISO date at which the period ends, the latest post, like and comment dates",
+        )
+        parser.add_argument('--batch-size', type=int, default=5000, help="Posts inserted per transaction")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the random generator")
+        parser.add_argument('--prefix', default='synthetic', help="Prefix of the team names and user emails")
+        parser.add_argument('--password', default='password', help="Password of every user")
+
+    def handle(self, *args, **options):
+        if options['teams'] < 1 or options['users'] < 1:
+            raise CommandError("At least one team and one user are required")
+        self.prefix = options['prefix']
+        if Team.objects.filter(name__startswith=f"{self.prefix}-").exists():
+            raise CommandError(f"A dataset with the prefix '{self.prefix}' already exists")
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.days = options['days']
+        self.end_date = options['end_date']
+        self.create_access_rows()
+
+        team_ids = self.create_teams(options['teams'])
+        user_ids = self.create_users(options['users'], team_ids, options['password'])
+        self.create_staff_users(options['staff'], team_ids, options['password'])
+        totals = self.create_posts(options['posts'], user_ids, options['likes'], options['comments'])
+        invalidate_cache(CacheNamespace.POST, CacheNamespace.LIKE, CacheNamespace.COMMENT, CacheNamespace.TEAM)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(team_ids)} teams, {len(user_ids)} users, {options['staff']} staff users, {totals['posts']} posts, "
+            f"{totals['likes']} likes and {totals['comments']} comments"
+        ))
+
+    def create_access_rows(self):
+        for name, description in CATEGORIES.items():
+            Category.objects.get_or_create(name=name, defaults={'description': description})
+        for name, description in PERMISSIONS.items():
+            Permission.objects.get_or_create(name=name, defaults={'description': description})
+
+    def create_teams(self, amount):
+        teams = [Team(name=f"{self.prefix}-team-{index}") for index in range(amount)]
+        return [team.id for team in Team.objects.bulk_create(teams, batch_size=self.batch_size)]
+
+    def create_users(self, amount, team_ids, password):
+        # Hashing is deliberately slow, every user shares the same hash
+        password_hash = make_password(password)
+        team_weights = get_skewed_weights(len(team_ids))
+        user_ids = []
+        for start in range(0, amount, self.batch_size):
+            batch_team_ids = self.rng.choices(team_ids, cum_weights=team_weights, k=min(self.batch_size, amount - start))
+            users = [
+                CustomUser(
+                    email=f"{self.prefix}-user{start + index}@example.com",
+                    first_name=self.rng.choice(WORDS).capitalize(),
+                    last_name=self.rng.choice(WORDS).capitalize(),
+                    password=password_hash,
+                    team_id=team_id,
+                )
+                for index, team_id in enumerate(batch_team_ids)
+            ]
+            user_ids += [user.id for user in CustomUser.objects.bulk_create(users)]
+        return user_ids
+
+    def create_staff_users(self, amount, team_ids, password):
+        password_hash = make_password(password)
+        CustomUser.objects.bulk_create([
+            CustomUser(
+                email=f"{self.prefix}-staff{index}@example.com",
+                first_name="Staff",
+                last_name=str(index),
+                password=password_hash,
+                team_id=team_ids[0],
+                is_staff=True,
+            )
+            for index in range(amount)
+        ])
+
+    def create_posts(self, amount, user_ids, likes, comments):
+        author_weights = get_skewed_weights(len(user_ids))
+        likes_per_post = likes / amount if amount else 0
+        comments_per_post = comments / amount if amount else 0
+        # Posts are spread over the period in id order, likes and comments follow their post
+        now = self.end_date
+        start_date = now - timedelta(days=self.days)
+        interval = (now - start_date) / amount if amount else None
+        totals = {'posts': 0, 'likes': 0, 'comments': 0}
+        for start in range(0, amount, self.batch_size):
+            batch_amount = min(self.batch_size, amount - start)
+            post_rows = []
+            category_permission_rows = []
+            like_rows = []
+            comment_rows = []
+            authors = self.rng.choices(user_ids, cum_weights=author_weights, k=batch_amount)
+            for post_id, author_id in zip(reserve_ids(Post, batch_amount), authors):
+                created_at = start_date + interval * (start + len(post_rows) + self.rng.random())
+                access = 0
+                for category, weights in ACCESS_DISTRIBUTION.items():
+                    permission = self.rng.choices(list(weights), weights=list(weights.values()))[0]
+                    access |= get_access_bits(category, permission)
+                    category_permission_rows.append((post_id, get_category_id(category), get_permission_id(permission)))
+                post_likes = self.build_likes(post_id, likes_per_post, user_ids, created_at, now)
+                post_comments = self.build_comments(post_id, comments_per_post, user_ids, created_at, now)
+                like_rows += post_likes
+                comment_rows += post_comments
+                content = self.build_text(20, 120)
+                post_rows.append((
+                    post_id, self.build_text(3, 8).capitalize(), content, content[:EXCERPT_LENGTH], author_id, access,
+                    sum(is_active for *_, is_active, _, _ in post_likes),
+                    sum(is_active for *_, is_active, _, _ in post_comments),
+                    created_at, created_at,
+                ))
+            with transaction.atomic():
+                copy_rows(Post, self.POST_FIELDS, post_rows)
+                copy_rows(PostCategoryPermission, ('post', 'category', 'permission'), category_permission_rows)
+                copy_rows(Like, ('post', 'user', 'is_active', 'created_at', 'last_modified'), like_rows)
+                copy_rows(Comment, ('post', 'user', 'content', 'is_active', 'created_at', 'last_modified'), comment_rows)
+
+            totals['posts'] += len(post_rows)
+            totals['likes'] += len(like_rows)
+            totals['comments'] += len(comment_rows)
+            self.stdout.write(f"-- {totals['posts']}/{amount} posts")
+        return totals
+
+    def build_text(self, min_words, max_words):
+        return ' '.join(self.rng.choices(WORDS, k=self.rng.randint(min_words, max_words)))
+
+    def build_date(self, created_at, now):
+        return created_at + (now - created_at) * self.rng.random()
+
+    def build_likes(self, post_id, likes_per_post, user_ids, created_at, now):
+        # A user likes a post at most once
+        amount = min(len(user_ids), round(self.rng.expovariate(1 / likes_per_post))) if likes_per_post else 0
+        likes = []
+        for user_id in self.rng.sample(user_ids, amount):
+            liked_at = self.build_date(created_at, now)
+            likes.append((post_id, user_id, self.rng.random() >= INACTIVE_RATIO, liked_at, liked_at))
+        return likes
+
+    def build_comments(self, post_id, comments_per_post, user_ids, created_at, now):
+        amount = round(self.rng.expovariate(1 / comments_per_post)) if comments_per_post else 0
+        comments = []
+        for user_id in self.rng.choices(user_ids, k=amount):
+            commented_at = self.build_date(created_at, now)
+            comments.append((post_id, user_id, self.build_text(5, 40), self.rng.random() >= INACTIVE_RATIO, commented_at, commented_at))
+        return comments
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from post.models import Post
+from like.models import Like
+from comment.models import Comment
+
+
+def count_active(model):
+    active_rows = model.objects.filter(post=OuterRef('pk'), is_active=True).order_by().values('post')
+    return Coalesce(Subquery(active_rows.annotate(total=Count('id')).values('total')), 0)
+
+
+class Command(BaseCommand):
+    help = "Recompute the like and comment counters of every post from the active rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Posts updated per statement")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        updated = 0
+        while True:
+            batch_ids = list(
+                Post.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not batch_ids:
+                break
+            with transaction.atomic():
+                updated += Post.objects.filter(id__in=batch_ids).update(
+                    like_count=count_active(Like),
+                    comment_count=count_active(Comment),
+                )
+            last_id = batch_ids[-1]
+        self.stdout.write(self.style.SUCCESS(f"Recomputed the counters of {updated} posts"))
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-17 12:10
+
+from django.db import migrations, models
+from common.utils import get_access_bits
+
+
+def fill_post_access(apps, schema_editor):
+    Post = apps.get_model('post', 'Post')
+    PostCategoryPermission = apps.get_model('post', 'PostCategoryPermission')
+    access_by_post = {}
+    category_permissions = PostCategoryPermission.objects.values_list('post_id', 'category__name', 'permission__name')
+    for post_id, category_name, permission_name in category_permissions.iterator():
+        access_by_post[post_id] = access_by_post.get(post_id, 0) | get_access_bits(category_name, permission_name)
+    posts = [Post(id=post_id, access=access) for post_id, access in access_by_post.items()]
+    Post.objects.bulk_update(posts, ['access'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0009_remove_post_read_permission_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='access',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(fill_post_access, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.1 on 2026-10-17 12:15
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_active(model):
+    active_rows = model.objects.filter(post=OuterRef('pk'), is_active=True).order_by().values('post')
+    return Coalesce(Subquery(active_rows.annotate(total=Count('id')).values('total')), 0)
+
+
+def fill_post_counters(apps, schema_editor):
+    Post = apps.get_model('post', 'Post')
+    Like = apps.get_model('like', 'Like')
+    Comment = apps.get_model('comment', 'Comment')
+    Post.objects.update(like_count=count_active(Like), comment_count=count_active(Comment))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0010_post_access'),
+        ('like', '0006_alter_like_unique_together'),
+        ('comment', '0006_alter_comment_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_post_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 14:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0012_post_post_created_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='access',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
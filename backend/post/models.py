@@ -1,12 +1,49 @@
 from common.models import BaseModel
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
-from common.constants import EXCERPT_LENGTH
+from common.cache import invalidate_cache
+from common.constants import (
+    EXCERPT_LENGTH, ACCESS_ALL, ACCESS_CATEGORY_OFFSET, ACCESS_PERMISSION_BITS, CacheNamespace,
+)
+from common.registry import get_category_name, get_permission_name
+from common.utils import get_access_bits, get_access_slot
 from user.models import CustomUser
 from category.models import Category
 from permission.models import Permission
 
 
+class PostQuerySet(models.QuerySet):
+
+    def refresh_access(self):
+        """
+        Rebuild the access bitmap of the posts from their stored category permissions.
+
+        The bits of every category permission are added up in a subquery, every category owns
+        its own bits so the sum is their union, and written with a single `UPDATE`.
+
+        Returns:
+            The number of updated posts.
+        """
+        permission_bits = Case(
+            *[
+                When(category__name=category_name, permission__name=permission_name, then=Value(get_access_bits(category_name, permission_name)))
+                for category_name in ACCESS_CATEGORY_OFFSET for permission_name in ACCESS_PERMISSION_BITS
+            ],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        post_access = (
+            PostCategoryPermission.objects.filter(post=OuterRef('pk')).order_by()
+            .values('post').annotate(access=Sum(permission_bits)).values('access')
+        )
+        rows = self.update(access=Coalesce(Subquery(post_access), Value(0), output_field=IntegerField()))
+        invalidate_cache(CacheNamespace.POST)
+        return rows
+
 
 class Post(BaseModel):
 
@@ -14,6 +51,17 @@ class Post(BaseModel):
     content = models.TextField(null=False, blank=False)
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     excerpt = models.CharField(max_length=200, null=False, default="")
+    # Bitmap with the read/edit bits of every category, kept in sync with PostCategoryPermission.
+    # Not indexed, a btree can not serve the access & mask > 0 filters of the permission queries
+    access = models.PositiveSmallIntegerField(default=0)
+    # Active likes and comments, kept in sync by PostCounterModel
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    objects = PostQuerySet.as_manager()
+
+    # Columns maintained with atomic updates, a full save of a stale instance must not overwrite them
+    DENORMALIZED_FIELDS = ('access', 'like_count', 'comment_count')
 
 
     def save(self, *args, **kwargs):
@@ -25,19 +73,83 @@ class Post(BaseModel):
             raise ValueError(_('Content must be set'))
 
         self.excerpt = self.content[:EXCERPT_LENGTH] if len(self.content) > EXCERPT_LENGTH else self.content
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields and 'excerpt' not in update_fields:
+            # The excerpt follows the content
+            kwargs['update_fields'] = [*update_fields, 'excerpt']
+        if not self._state.adding and update_fields is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DENORMALIZED_FIELDS
+            ]
         super().save(*args, **kwargs)
+        invalidate_cache(CacheNamespace.POST)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_cache(CacheNamespace.POST)
+        return result
+
+    def set_category_access(self, category_name, permission_name):
+        # Replace the bits of a single category without touching the others
+        access, access_expression = self.get_category_access_update({category_name: permission_name})
+        self.access = access
+        Post.objects.filter(pk=self.pk).update(access=access_expression)
+        invalidate_cache(CacheNamespace.POST)
+
+    def get_category_access_update(self, permission_names):
+        # New bitmap with the bits of the given categories replaced, and the expression applying
+        # the same change to the stored bitmap, so the other categories keep their stored bits
+        slots = 0
+        bits = 0
+        for category_name, permission_name in permission_names.items():
+            slots |= get_access_slot(category_name)
+            bits |= get_access_bits(category_name, permission_name)
+        access = (self.access & ~slots) | bits
+        return access, F('access').bitand(ACCESS_ALL & ~slots).bitor(bits)
+
+    def refresh_access(self):
+        # Rebuild the whole bitmap from the stored category permissions
+        Post.objects.filter(pk=self.pk).refresh_access()
+        self.refresh_from_db(fields=['access'])
 
     def __str__(self):
         return self.title
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Pages of the post list and the team feed, id breaks the ties of the cursor
+            models.Index(fields=['-created_at', '-id'], name='post_created_at_id_idx'),
+        ]
+
+class PostCategoryPermissionQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        # A queryset update skips save, the bitmaps of the posts it touches are rebuilt afterwards.
+        # The posts are read first, the update may change the rows the filter matches
+        with transaction.atomic(using=self.db, savepoint=False):
+            post_ids = set(self.values_list('post_id', flat=True))
+            rows = super().update(**kwargs)
+            new_post = kwargs.get('post', kwargs.get('post_id'))
+            if isinstance(new_post, (Post, int)):
+                post_ids.add(getattr(new_post, 'pk', new_post))
+            Post.objects.filter(pk__in=post_ids).refresh_access()
+        return rows
+
 
 class PostCategoryPermission(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='post_category_permission')
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     permission = models.ForeignKey(Permission, on_delete=models.CASCADE)
 
+    # bulk_create skips save and the bitmap, its callers write the access of the posts
+    objects = PostCategoryPermissionQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.post.set_category_access(get_category_name(self.category_id), get_permission_name(self.permission_id))
+
     def __str__(self):
         return f"{self.post.title} - {self.category.name} - {self.permission.name}"
     
@@ -45,3 +157,10 @@ class PostCategoryPermission(models.Model):
         unique_together = ('post', 'category')
 
 
+@receiver(post_delete, sender=PostCategoryPermission)
+def refresh_deleted_category_access(sender, instance, origin=None, **kwargs):
+    # Covers the instance and queryset deletes, the admin bulk delete and the cascades from a
+    # category or a permission. The category permissions of a deleted post need no refresh
+    if isinstance(origin, Post) or (isinstance(origin, models.QuerySet) and origin.model is Post):
+        return
+    Post.objects.filter(pk=instance.post_id).refresh_access()
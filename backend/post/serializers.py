@@ -1,3 +1,5 @@
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
 from rest_framework import serializers
 from post.models import Post, PostCategoryPermission
 from user.serializers import CustomUserSerializer
@@ -5,11 +7,31 @@ from category.serialiazers import CategorySerializer
 from category.models import Category
 from permission.serializers import PermissionSerializer
 from permission.models import Permission
-from common.constants import CATEGORIES
+from common.cache import invalidate_cache
+from common.constants import BULK_CREATE_MAX_POSTS, CATEGORIES, EXCERPT_LENGTH, CacheNamespace
+from common.registry import get_category, get_category_name, get_permission
+from common.utils import get_access_bits
+
+class RegistryPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    # Resolve the ids with the process registry instead of a query per category permission
+    def __init__(self, get_instance, **kwargs):
+        self.get_instance = get_instance
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            instance = self.get_instance(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
 
 class PostCategoryPermissionSerializer(serializers.ModelSerializer):
-    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all())
-    permission = serializers.PrimaryKeyRelatedField(queryset=Permission.objects.all())
+    category = RegistryPrimaryKeyRelatedField(get_category, queryset=Category.objects.all())
+    permission = RegistryPrimaryKeyRelatedField(get_permission, queryset=Permission.objects.all())
     class Meta:
         model = PostCategoryPermission
         fields = ['category', 'permission']
@@ -17,13 +39,18 @@ class PostCategoryPermissionSerializer(serializers.ModelSerializer):
 class PostListCreateSerializer(serializers.ModelSerializer):
     category_permission = PostCategoryPermissionSerializer(many=True, source='post_category_permission')
     user = CustomUserSerializer(read_only=True)
+    liked_by_me = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
-        fields = ['id', 'title', 'content','category_permission','user','excerpt','created_at']
-        read_only_fields = ('id','excerpt','created_at')
+        fields = ['id', 'title', 'content','category_permission','user','excerpt','created_at','like_count','comment_count','liked_by_me']
+        read_only_fields = ('id','excerpt','created_at','like_count','comment_count')
         extra_kwargs = {'content': {'write_only': True}}
 
+    def get_liked_by_me(self, obj):
+        # Annotated by the view, a post that was just created has no likes
+        return getattr(obj, 'liked_by_me', False)
+
     def create(self, validated_data):
         category_permission = validated_data.pop('post_category_permission')
         post = Post.objects.create(**validated_data)
@@ -50,23 +77,81 @@ class PostListCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Each category in post_category_permission must be different from each other")
         return attrs
 
+class PostBulkCreateListSerializer(serializers.ListSerializer):
+
+    def create(self, validated_data):
+        # bulk_create skips Post.save and PostCategoryPermission.save, so the excerpt and the
+        # access bitmap are computed here and every table gets a single INSERT
+        posts = []
+        category_permissions = []
+        for attrs in validated_data:
+            category_permission = attrs.pop('post_category_permission')
+            post = Post(**attrs)
+            post.excerpt = post.content[:EXCERPT_LENGTH]
+            for cp in category_permission:
+                post.access |= get_access_bits(cp['category'].name, cp['permission'].name)
+                category_permissions.append(
+                    PostCategoryPermission(post=post, category=cp['category'], permission=cp['permission'])
+                )
+            posts.append(post)
+        with transaction.atomic():
+            Post.objects.bulk_create(posts)
+            PostCategoryPermission.objects.bulk_create(category_permissions)
+        invalidate_cache(CacheNamespace.POST)
+        return posts
+
+class PostBulkCreateSerializer(PostListCreateSerializer):
+    # Validated with the rules of a single post, created all at once
+    class Meta(PostListCreateSerializer.Meta):
+        list_serializer_class = PostBulkCreateListSerializer
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        kwargs.setdefault('allow_empty', False)
+        kwargs.setdefault('max_length', BULK_CREATE_MAX_POSTS)
+        return super().many_init(*args, **kwargs)
+
 class PostRetrieveUpdateDestroySerializer(serializers.ModelSerializer):
     category_permission = PostCategoryPermissionSerializer(many=True, source='post_category_permission')
     user = CustomUserSerializer(read_only=True)
+    liked_by_me = serializers.SerializerMethodField()
     class Meta:
         model = Post
-        fields = ['id','title','content','category_permission','user','created_at']
-        read_only_fields = ('created_at',)
+        fields = ['id','title','content','category_permission','user','created_at','like_count','comment_count','liked_by_me']
+        read_only_fields = ('created_at','like_count','comment_count')
+
+    def get_liked_by_me(self, obj):
+        # Annotated by the view
+        return getattr(obj, 'liked_by_me', False)
 
     def update(self, instance, validated_data):
-        category_permission = validated_data.pop('post_category_permission', None)
-        instance = super().update(instance, validated_data)
-        if category_permission:
-            existing_permissions = instance.post_category_permission.filter(post=instance)
-            for cp in category_permission:
-                category = cp['category']
-                permission = cp['permission']
-                if existing_permissions.filter(category=category).exists():
-                    existing_permissions.filter(category=category).update(permission=permission)
+        category_permission = validated_data.pop('post_category_permission', None) or []
+        # Only the columns that change are written
+        update_fields = [field for field, value in validated_data.items() if getattr(instance, field) != value]
+        for field in update_fields:
+            setattr(instance, field, validated_data[field])
+        # The categories of the post whose permission changes, compared with the prefetched rows
+        current_permissions = {cp.category_id: cp.permission_id for cp in instance.post_category_permission.all()}
+        changed_permissions = {
+            cp['category'].id: cp['permission'] for cp in category_permission
+            if current_permissions.get(cp['category'].id, cp['permission'].id) != cp['permission'].id
+        }
+        if not update_fields and not changed_permissions:
+            return instance
+
+        with transaction.atomic():
+            if changed_permissions:
+                # Every category is updated by a single statement, the queryset rebuilds the access bitmap
+                permission_by_category = Case(
+                    *[When(category_id=category_id, then=Value(permission.id)) for category_id, permission in changed_permissions.items()],
+                    output_field=IntegerField(),
+                )
+                PostCategoryPermission.objects.filter(post=instance, category_id__in=changed_permissions).update(
+                    permission=permission_by_category
+                )
+                instance.access, _ = instance.get_category_access_update({
+                    get_category_name(category_id): permission.name for category_id, permission in changed_permissions.items()
+                })
+            instance.save(update_fields=[*update_fields, 'last_modified'])
         return instance
 
@@ -2,10 +2,9 @@ from factory.django import DjangoModelFactory
 from factory import Faker, SubFactory, LazyAttribute
 from post.models import Post, PostCategoryPermission
 from user.tests.factories import CustomUserFactory  
-from category.models import Category
 from category.tests.factories import CategoryFactory
-from permission.models import Permission
 from permission.tests.factories import PermissionFactory
+from common.registry import get_category, get_category_id, get_permission, get_permission_id
 from common.constants import CATEGORIES, EXCERPT_LENGTH, DEFAULT_ACCESS_CONTROL, WORDS_MOCK_TEXT
 
 class PostFactory(DjangoModelFactory):
@@ -31,8 +30,8 @@ class PostCategoryPermissionFactory(DjangoModelFactory):
         category_permission = DEFAULT_ACCESS_CONTROL if not kwargs.get('category_permission') else kwargs.get('category_permission')
         post = PostFactory.create() if not kwargs.get('post') else kwargs.get('post')
         for category, permission in category_permission.items():
-            category = Category.objects.get(name=category)
-            permission = Permission.objects.get(name=permission)
+            category = get_category(get_category_id(category))
+            permission = get_permission(get_permission_id(permission))
             post_category_permission = PostCategoryPermission.objects.create(post=post, category=category, permission=permission)
             access.append(post_category_permission)
         return access
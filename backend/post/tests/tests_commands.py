@@ -0,0 +1,184 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from tempfile import TemporaryDirectory
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from post.models import Post, PostCategoryPermission
+from like.models import Like
+from comment.models import Comment
+from team.models import Team
+from user.models import CustomUser
+from common.constants import CATEGORIES
+from post.tests.factories import PostFactory
+from like.tests.factories import LikeFactory
+from comment.tests.factories import CommentFactory
+from user.tests.factories import CustomUserFactory
+
+class RecomputePostCountersCommandTests(TestCase):
+
+    def test_recompute_post_counters_repairs_drifted_counters(self):
+        # Arrange
+        posts = PostFactory.create_batch(3)
+        LikeFactory.create_batch(2, post=posts[0])
+        LikeFactory(post=posts[0], is_active=False)
+        CommentFactory.create_batch(4, post=posts[1])
+        Post.objects.update(like_count=10, comment_count=10)
+        # Act
+        call_command('recompute_post_counters', batch_size=2, stdout=StringIO())
+        counters = {post.id: (post.like_count, post.comment_count) for post in Post.objects.all()}
+        # Assert
+        self.assertEqual(counters[posts[0].id], (2, 0))
+        self.assertEqual(counters[posts[1].id], (0, 4))
+        self.assertEqual(counters[posts[2].id], (0, 0))
+
+
+class DeactivateActivityCommandTests(TestCase):
+
+    def test_deactivate_activity_deactivates_the_likes_and_comments_of_the_user_in_batches(self):
+        # Arrange
+        user = CustomUserFactory()
+        posts = PostFactory.create_batch(3)
+        for post in posts:
+            LikeFactory(user=user, post=post)
+            CommentFactory.create_batch(2, user=user, post=post)
+        other_like = LikeFactory(post=posts[0])
+        output = StringIO()
+        # Act
+        call_command('deactivate_activity', user=user.id, batch_size=2, sleep=0, stdout=output)
+        counters = {post.id: (post.like_count, post.comment_count) for post in Post.objects.all()}
+        # Assert
+        self.assertFalse(Like.objects.filter(user=user, is_active=True).exists())
+        self.assertFalse(Comment.objects.filter(user=user, is_active=True).exists())
+        self.assertTrue(Like.objects.get(id=other_like.id).is_active)
+        self.assertEqual(counters, {posts[0].id: (1, 0), posts[1].id: (0, 0), posts[2].id: (0, 0)})
+        self.assertIn("Deactivated 3 likes in 2 batches", output.getvalue())
+        self.assertIn("Deactivated 6 comments in 3 batches", output.getvalue())
+
+    def test_deactivate_activity_only_sleeps_when_another_batch_follows(self):
+        # Arrange
+        user = CustomUserFactory()
+        LikeFactory.create_batch(3, user=user)
+        # Act
+        with patch('post.management.commands.deactivate_activity.time.sleep') as sleep:
+            call_command('deactivate_activity', user=user.id, models=['like'], batch_size=2, sleep=1, stdout=StringIO())
+        # Assert
+        sleep.assert_called_once_with(1)
+
+    def test_deactivate_activity_only_deactivates_the_given_models(self):
+        # Arrange
+        post = PostFactory()
+        LikeFactory.create_batch(2, post=post)
+        CommentFactory.create_batch(2, post=post)
+        # Act
+        call_command('deactivate_activity', post=post.id, models=['comment'], sleep=0, stdout=StringIO())
+        post.refresh_from_db()
+        # Assert
+        self.assertEqual((post.like_count, post.comment_count), (2, 0))
+
+    def test_deactivate_activity_requires_a_user_or_a_post(self):
+        # Act
+        # Assert
+        with self.assertRaises(CommandError):
+            call_command('deactivate_activity', stdout=StringIO())
+
+
+class GenerateDatasetCommandTests(TestCase):
+
+    def generate_dataset(self, **options):
+        arguments = {'teams': 3, 'users': 20, 'posts': 30, 'likes': 90, 'comments': 60, 'batch_size': 7}
+        call_command('generate_dataset', **{**arguments, **options}, stdout=StringIO())
+
+    def test_generate_dataset_creates_posts_with_consistent_access_and_counters(self):
+        # Act
+        self.generate_dataset()
+        # Assert
+        self.assertEqual(Team.objects.filter(name__startswith='synthetic-').count(), 3)
+        self.assertEqual(CustomUser.objects.filter(email__startswith='synthetic-', is_staff=False).count(), 20)
+        self.assertEqual(CustomUser.objects.filter(email__startswith='synthetic-', is_staff=True).count(), 1)
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(PostCategoryPermission.objects.count(), 30 * len(CATEGORIES))
+        for post in Post.objects.all():
+            access = post.access
+            post.refresh_access()
+            self.assertEqual(post.access, access)
+            self.assertEqual(post.like_count, Like.objects.filter(post=post, is_active=True).count())
+            self.assertEqual(post.comment_count, Comment.objects.filter(post=post, is_active=True).count())
+
+    def test_generate_dataset_is_deterministic_by_seed(self):
+        # Arrange
+        def get_dataset(prefix):
+            posts = Post.objects.filter(user__email__startswith=f'{prefix}-').order_by('id')
+            return list(posts.values_list('title', 'access', 'like_count', 'comment_count', 'created_at', 'last_modified'))
+        # Act
+        self.generate_dataset(prefix='first', seed=7)
+        self.generate_dataset(prefix='second', seed=7)
+        self.generate_dataset(prefix='third', seed=8)
+        # Assert
+        self.assertEqual(get_dataset('first'), get_dataset('second'))
+        self.assertNotEqual(get_dataset('first'), get_dataset('third'))
+
+    def test_generate_dataset_inserts_the_same_rows_without_copy_on_other_vendors(self):
+        # Arrange
+        def get_dataset(prefix):
+            posts = Post.objects.filter(user__email__startswith=f'{prefix}-').order_by('id')
+            return list(posts.values_list('title', 'access', 'like_count', 'comment_count', 'created_at', 'last_modified'))
+        self.generate_dataset(prefix='copy', seed=7)
+        # Act
+        with patch.object(connection, 'vendor', 'sqlite'):
+            self.generate_dataset(prefix='insert', seed=7)
+        # Assert
+        self.assertEqual(get_dataset('insert'), get_dataset('copy'))
+        self.assertEqual(Like.objects.filter(post__user__email__startswith='insert-').count(), Like.objects.filter(post__user__email__startswith='copy-').count())
+        self.assertEqual(PostCategoryPermission.objects.filter(post__user__email__startswith='insert-').count(), 30 * len(CATEGORIES))
+
+    def test_generate_dataset_spreads_the_dates_back_from_the_end_date(self):
+        # Arrange
+        end_date = datetime(2023, 6, 1, tzinfo=timezone.utc)
+        # Act
+        self.generate_dataset(days=10, end_date=end_date)
+        # Assert
+        dates = list(Post.objects.values_list('created_at', flat=True))
+        dates += list(Like.objects.values_list('created_at', flat=True))
+        dates += list(Comment.objects.values_list('created_at', flat=True))
+        self.assertTrue(all(end_date - timedelta(days=10) <= date <= end_date for date in dates))
+
+    def test_generate_dataset_refuses_to_reuse_a_prefix(self):
+        # Arrange
+        self.generate_dataset(posts=0)
+        # Act
+        # Assert
+        with self.assertRaises(CommandError):
+            self.generate_dataset(posts=0)
+
+
+class BenchmarkEndpointsCommandTests(TestCase):
+
+    def test_benchmark_endpoints_saves_the_results_of_every_user_class(self):
+        # Arrange
+        call_command('generate_dataset', teams=2, users=10, posts=20, likes=40, comments=40, stdout=StringIO())
+        output = os.path.join(self.enterContext(TemporaryDirectory()), 'results.json')
+        # Act
+        call_command('benchmark_endpoints', requests=2, warmup=0, output=output, stdout=StringIO())
+        with open(output) as output_file:
+            report = json.load(output_file)
+        # Assert
+        user_classes = {result['user_class'] for result in report['results']}
+        endpoints = {result['endpoint'] for result in report['results']}
+        self.assertEqual(user_classes, {'anonymous', 'owner', 'same_team', 'other_team', 'staff'})
+        self.assertTrue({'post-list', 'post-retrieve', 'like-list', 'comment-list', 'like-create', 'like-delete', 'user-login'} <= endpoints)
+        for result in report['results']:
+            self.assertEqual(result['requests'], 2)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreaterEqual(result['rows_scanned'], 0)
+        self.assertEqual(report['dataset']['posts'], 20)
+
+    def test_benchmark_endpoints_requires_a_seeded_dataset(self):
+        # Act
+        # Assert
+        with self.assertRaises(CommandError):
+            call_command('benchmark_endpoints', requests=1, warmup=0, stdout=StringIO())
@@ -4,7 +4,9 @@ from user.tests.factories import CustomUserFactory
 from post.models import Post, PostCategoryPermission
 from category.tests.factories import CategoryFactory
 from permission.tests.factories import PermissionFactory
-from common.constants import EXCERPT_LENGTH, CATEGORIES, PERMISSIONS
+from permission.models import Permission
+from common.constants import EXCERPT_LENGTH, CATEGORIES, PERMISSIONS, DEFAULT_ACCESS_CONTROL, AccessCategory, AccessPermission
+from common.utils import get_access_bits
 
 # Create your tests here.
 class PostModelTests(TestCase):
@@ -118,3 +120,83 @@ class PostModelTests(TestCase):
         # Act & Assert
         with self.assertRaises(ValueError):
             Post.objects.create(**data)
+
+    def test_create_post_category_permissions_sets_the_post_access_bitmap(self):
+        # Arrange
+        post = PostFactory()
+        expected_access = 0
+        for category, permission in DEFAULT_ACCESS_CONTROL.items():
+            expected_access |= get_access_bits(category, permission)
+        # Act
+        PostCategoryPermissionFactory.create(post=post)
+        post_db = Post.objects.get(id=post.id)
+        # Assert
+        self.assertEqual(post_db.access, expected_access)
+        self.assertEqual(post.access, expected_access)
+
+    def test_update_a_post_category_permission_only_changes_the_bits_of_its_category(self):
+        # Arrange
+        post = PostFactory()
+        PostCategoryPermissionFactory.create(post=post)
+        post_category_permission = PostCategoryPermission.objects.get(post=post, category__name=AccessCategory.TEAM)
+        post_category_permission.permission = Permission.objects.get(name=AccessPermission.NO_PERMISSION)
+        expected_access = post.access & ~get_access_bits(AccessCategory.TEAM, AccessPermission.EDIT)
+        # Act
+        post_category_permission.save()
+        post_db = Post.objects.get(id=post.id)
+        # Assert
+        self.assertEqual(post_db.access, expected_access)
+
+    def test_a_queryset_update_of_the_category_permissions_rebuilds_the_bitmap(self):
+        # Arrange
+        post = PostFactory()
+        PostCategoryPermissionFactory.create(post=post)
+        read_permission = Permission.objects.get(name=AccessPermission.READ)
+        expected_access = 0
+        for category in CATEGORIES:
+            expected_access |= get_access_bits(category, AccessPermission.READ)
+        # Act
+        PostCategoryPermission.objects.filter(post=post).update(permission=read_permission)
+        post_db = Post.objects.get(id=post.id)
+        # Assert
+        self.assertEqual(post_db.access, expected_access)
+
+    def test_refresh_access_rebuilds_the_bitmap_from_the_stored_category_permissions(self):
+        # Arrange
+        post = PostFactory()
+        PostCategoryPermissionFactory.create(post=post)
+        expected_access = post.access
+        Post.objects.filter(id=post.id).update(access=0)
+        # Act
+        post.refresh_access()
+        # Assert
+        self.assertEqual(post.access, expected_access)
+        self.assertEqual(Post.objects.get(id=post.id).access, expected_access)
+
+    def test_a_queryset_delete_of_a_category_permission_clears_the_bits_of_its_category(self):
+        # Arrange
+        post = PostFactory()
+        PostCategoryPermissionFactory.create(post=post)
+        expected_access = post.access & ~get_access_bits(AccessCategory.PUBLIC, AccessPermission.EDIT)
+        # Act
+        PostCategoryPermission.objects.filter(post=post, category__name=AccessCategory.PUBLIC).delete()
+        post_db = Post.objects.get(id=post.id)
+        # Assert
+        self.assertEqual(post_db.access, expected_access)
+
+    def test_deleting_a_permission_clears_the_bits_of_the_category_permissions_deleted_in_cascade(self):
+        # Arrange
+        post = PostFactory()
+        PostCategoryPermissionFactory.create(post=post)
+        read_permission = Permission.objects.get(name=AccessPermission.READ)
+        read_bits = 0
+        for category, permission in DEFAULT_ACCESS_CONTROL.items():
+            if permission == AccessPermission.READ:
+                read_bits |= get_access_bits(category, permission)
+        expected_access = post.access & ~read_bits
+        # Act
+        read_permission.delete()
+        post_db = Post.objects.get(id=post.id)
+        # Assert
+        self.assertNotEqual(read_bits, 0)
+        self.assertEqual(post_db.access, expected_access)
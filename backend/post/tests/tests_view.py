@@ -1,3 +1,4 @@
+import json
 from django.forms.models import model_to_dict
 from rest_framework.test import APITestCase
 from rest_framework.reverse import reverse
@@ -13,9 +14,15 @@ from comment.tests.factories import CommentFactory
 from comment.models import Comment
 from category.tests.factories import CategoryFactory
 from permission.tests.factories import PermissionFactory
-from common.constants import EXCERPT_LENGTH, CONTENT_MOCK, CATEGORIES, AccessCategory, AccessPermission
+from permission.models import Permission
+from common.constants import EXCERPT_LENGTH, CONTENT_MOCK, CATEGORIES, DEFAULT_ACCESS_CONTROL, AccessCategory, AccessPermission
 from common.paginator import TenResultsSetPagination
-from common.utils import create_custom_category_permissions_handler, create_default_category_permissions_handler
+from common.tests.mixins import NPlusOneQueryTestMixin, QueryPlanTestMixin
+from unittest.mock import patch
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from common.utils import create_custom_category_permissions_handler, create_default_category_permissions_handler, get_access_bits
 
 class PostUnauthenticatedUserCreateViewTests(APITestCase):
 
@@ -127,6 +134,18 @@ class PostUnauthenticatedUserRetrieveViewTests(APITestCase):
         self.assertEqual(data.get('user').get('first_name'), post.user.first_name)
         self.assertEqual(data.get('user').get('last_name'), post.user.last_name)
 
+    def test_unauthenticated_user_receives_liked_by_me_as_false_when_retrieve_public_posts(self):
+        # Arrange
+        post = PostFactory()
+        PostCategoryPermissionFactory(post=post, category_permission=self.factory_category_permission)
+        LikeFactory(post=post)
+        url = reverse('post-retrieve-update-delete', args=[post.id])
+        # Act
+        response = self.client.get(url)
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data.get('liked_by_me'))
+
     def test_unauthenticated_user_does_not_receive_excerpt_when_see_post_details(self):
         # Arrange
         self.factory_category_permission[AccessCategory.PUBLIC] = AccessPermission.READ
@@ -1075,6 +1094,35 @@ class PostAuthenticatedUserListViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(count, amount_posts)
 
+    def test_authenticated_user_receives_the_like_and_comment_counts_of_each_post(self):
+        # Arrange
+        post = PostFactory()
+        PostCategoryPermissionFactory.create(post=post, category_permission=self.factory_category_permission)
+        LikeFactory.create_batch(2, post=post)
+        LikeFactory(post=post, is_active=False)
+        CommentFactory.create_batch(3, post=post)
+        # Act
+        response = self.client.get(self.url)
+        result = response.data.get('results')[0]
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(result.get('like_count'), 2)
+        self.assertEqual(result.get('comment_count'), 3)
+
+    def test_authenticated_user_receives_whether_they_liked_each_post_of_the_page(self):
+        # Arrange
+        posts = PostFactory.create_batch(3)
+        PostCategoryPermissionFactory.create_batch(posts, category_permission=self.factory_category_permission)
+        LikeFactory(post=posts[0], user=self.user)
+        LikeFactory(post=posts[1], user=self.user, is_active=False)
+        LikeFactory(post=posts[2])
+        # Act
+        response = self.client.get(self.url)
+        liked_by_me = {result['id']: result['liked_by_me'] for result in response.data.get('results')}
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(liked_by_me, {posts[0].id: True, posts[1].id: False, posts[2].id: False})
+
 class PostAuthenticatedUserRetrieveViewTests(APITestCase):
     def setUp(self):
         self.team = TeamFactory()
@@ -1929,6 +1977,24 @@ class PostAuthenticatedUserUpdateViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(category_permission_db.permission.name, AccessPermission.READ)
 
+    def test_authenticated_user_can_not_update_a_post_again_after_removing_their_edit_permission_and_404_is_returned(self):
+        # Arrange
+        self.factory_category_permission[AccessCategory.AUTHENTICATED] = AccessPermission.EDIT
+        post = PostFactory()
+        PostCategoryPermissionFactory(post=post, category_permission=self.factory_category_permission)
+        url = reverse('post-retrieve-update-delete', args=[post.id])
+        self.factory_category_permission[AccessCategory.AUTHENTICATED] = AccessPermission.READ
+        category_permission = create_custom_category_permissions_handler(self.categories, self.permissions, self.factory_category_permission)
+        data = {
+            'category_permission': category_permission
+        }
+        # Act
+        first_response = self.client.patch(url, data, format='json')
+        second_response = self.client.patch(url, {'title': 'New title'}, format='json')
+        # Assert
+        self.assertEqual(first_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(second_response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_authenticated_user_can_not_update_a_post_that_does_not_exist_and_404_is_returned(self):
         # Arrange
         post_id = 100
@@ -2117,4 +2183,797 @@ class PostAdminUserViewTests(APITestCase):
         response = self.client.delete(url, format='json')
         # Assert
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertEqual(Post.objects.count(), current_posts - 1)
\ No newline at end of file
+        self.assertEqual(Post.objects.count(), current_posts - 1)
+
+
+class PostQueryCountViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.team = TeamFactory()
+        self.user = CustomUserFactory(team=self.team)
+        self.client.force_authenticate(self.user)
+        self.permissions = PermissionFactory.create_batch()
+        self.categories = CategoryFactory.create_batch()
+        self.factory_category_permission = {
+            AccessCategory.PUBLIC: AccessPermission.READ,
+            AccessCategory.AUTHENTICATED: AccessPermission.READ,
+            AccessCategory.TEAM: AccessPermission.EDIT,
+            AccessCategory.AUTHOR: AccessPermission.EDIT
+        }
+        # Every post has a different author on a different team
+        posts = PostFactory.create_batch(50)
+        PostCategoryPermissionFactory.create_batch(posts, category_permission=self.factory_category_permission)
+        self.url = reverse('post-list-create')
+        # Team feed, user posts, page with author and team, category permissions
+        self.expected_queries = 4
+
+    def test_list_a_page_of_10_posts_costs_a_constant_number_of_queries(self):
+        # Act
+        with self.assertNumQueries(self.expected_queries):
+            response = self.client.get(self.url, {'page_size': 10})
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data.get('results')), 10)
+
+    def test_list_a_page_of_50_posts_costs_the_same_number_of_queries(self):
+        # Act
+        with self.assertNumQueries(self.expected_queries):
+            response = self.client.get(self.url, {'page_size': 50})
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data.get('results')), 50)
+        self.assertEqual(len(response.data.get('results')[0].get('category_permission')), len(CATEGORIES))
+
+    def test_create_a_post_does_not_query_the_category_and_permission_tables(self):
+        # Arrange
+        data = {
+            "title": "test title",
+            "content": "This is the content of the Post",
+            "category_permission": create_default_category_permissions_handler(self.categories, self.permissions)
+        }
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, data, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        tables = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('category_category', tables)
+        self.assertNotIn('permission_permission', tables)
+
+    def test_list_a_page_with_the_team_feed_cached_costs_one_query_less(self):
+        # Arrange
+        self.client.get(self.url)
+        # Act
+        with self.assertNumQueries(self.expected_queries - 1):
+            response = self.client.get(self.url, {'page': 2})
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data.get('results')), 10)
+
+    def test_retrieve_a_post_costs_a_constant_number_of_queries(self):
+        # Arrange
+        post = Post.objects.first()
+        url = reverse('post-retrieve-update-delete', args=[post.id])
+        # Act
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get('user').get('team').get('id'), post.user.team_id)
+
+    def get_own_post_url(self):
+        post = PostFactory(user=self.user)
+        PostCategoryPermissionFactory(post=post, category_permission=self.factory_category_permission)
+        return post, reverse('post-retrieve-update-delete', args=[post.id])
+
+    def test_update_a_post_with_put_writes_every_category_permission_in_one_statement(self):
+        # Arrange
+        post, url = self.get_own_post_url()
+        self.factory_category_permission[AccessCategory.PUBLIC] = AccessPermission.NO_PERMISSION
+        self.factory_category_permission[AccessCategory.AUTHENTICATED] = AccessPermission.EDIT
+        self.factory_category_permission[AccessCategory.TEAM] = AccessPermission.READ
+        data = {
+            'title': 'New title',
+            'content': 'New Content',
+            'category_permission': create_custom_category_permissions_handler(self.categories, self.permissions, self.factory_category_permission)
+        }
+        # Act
+        # Post and category permissions, savepoint, posts of the category permissions, category permissions update,
+        # access bitmap, post update, release, category permissions of the response
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(url, data, format='json')
+        post.refresh_from_db()
+        # Assert
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries.captured_queries), 9)
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(post.excerpt, data['content'])
+        self.assertEqual(post.access, sum(
+            get_access_bits(category, permission) for category, permission in self.factory_category_permission.items()
+        ))
+        self.assertCountEqual([dict(cp) for cp in response.data.get('category_permission')], data['category_permission'])
+
+    def test_update_a_post_with_patch_writes_only_the_changed_columns(self):
+        # Arrange
+        post, url = self.get_own_post_url()
+        # Act
+        # Post and category permissions, savepoint, post update, release, category permissions of the response
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url, {'title': 'New title'}, format='json')
+        # Assert
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries.captured_queries), 6)
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"title"', updates[0])
+        self.assertNotIn('"content"', updates[0])
+        self.assertNotIn('"like_count"', updates[0])
+
+    def test_update_a_post_with_patch_without_changes_does_not_write(self):
+        # Arrange
+        post, url = self.get_own_post_url()
+        # Act
+        # Post and category permissions, category permissions of the response
+        with self.assertNumQueries(3):
+            response = self.client.patch(url, {'title': post.title}, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_a_page_of_liked_posts_does_not_add_queries(self):
+        # Arrange
+        for post in Post.objects.all():
+            LikeFactory(post=post, user=self.user)
+        # Act
+        with self.assertNumQueries(self.expected_queries):
+            response = self.client.get(self.url, {'page_size': 50})
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(all(result.get('liked_by_me') for result in response.data.get('results')))
+
+class PostCursorPaginationViewTests(APITestCase):
+    def setUp(self):
+        self.team = TeamFactory()
+        self.user = CustomUserFactory(team=self.team)
+        self.client.force_authenticate(self.user)
+        self.permissions = PermissionFactory.create_batch()
+        self.categories = CategoryFactory.create_batch()
+        self.factory_category_permission = {
+            AccessCategory.PUBLIC: AccessPermission.READ,
+            AccessCategory.AUTHENTICATED: AccessPermission.READ,
+            AccessCategory.TEAM: AccessPermission.EDIT,
+            AccessCategory.AUTHOR: AccessPermission.EDIT
+        }
+        self.url = reverse('post-list-create')
+
+    def test_authenticated_user_can_list_posts_with_cursor_pagination_and_count_is_not_returned(self):
+        # Arrange
+        posts = PostFactory.create_batch(3)
+        PostCategoryPermissionFactory.create_batch(posts, category_permission=self.factory_category_permission)
+        # Act
+        response = self.client.get(self.url, {'pagination': 'cursor'})
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data.get('next'))
+        self.assertEqual(len(response.data.get('results')), 3)
+
+    def test_authenticated_user_can_follow_the_cursor_through_every_post_in_order(self):
+        # Arrange
+        amount_posts = 12
+        posts = PostFactory.create_batch(amount_posts)
+        PostCategoryPermissionFactory.create_batch(posts, category_permission=self.factory_category_permission)
+        expected_ids = [post.id for post in reversed(posts)]
+        # Act
+        response = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 5})
+        listed_ids = [result['id'] for result in response.data.get('results')]
+        while response.data.get('next'):
+            response = self.client.get(response.data.get('next'))
+            listed_ids += [result['id'] for result in response.data.get('results')]
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(listed_ids, expected_ids)
+
+    def test_the_cursor_pages_through_posts_sharing_the_same_creation_date(self):
+        # Arrange
+        posts = PostFactory.create_batch(7)
+        PostCategoryPermissionFactory.create_batch(posts, category_permission=self.factory_category_permission)
+        Post.objects.update(created_at=posts[0].created_at)
+        expected_ids = sorted((post.id for post in posts), reverse=True)
+        # Act
+        response = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 3})
+        listed_ids = [result['id'] for result in response.data.get('results')]
+        while response.data.get('next'):
+            response = self.client.get(response.data.get('next'))
+            listed_ids += [result['id'] for result in response.data.get('results')]
+        previous_ids = []
+        while response.data.get('previous'):
+            response = self.client.get(response.data.get('previous'))
+            previous_ids = [result['id'] for result in response.data.get('results')] + previous_ids
+        # Assert
+        self.assertEqual(listed_ids, expected_ids)
+        # The last page is not listed again on the way back
+        self.assertEqual(previous_ids, expected_ids[:6])
+
+    def test_an_invalid_cursor_returns_404(self):
+        # Act
+        response = self.client.get(self.url, {'pagination': 'cursor', 'cursor': 'cD0yMDI0'})
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_pagination_keeps_the_permission_filter(self):
+        # Arrange
+        visible_posts = PostFactory.create_batch(2)
+        PostCategoryPermissionFactory.create_batch(visible_posts, category_permission=self.factory_category_permission)
+        self.factory_category_permission[AccessCategory.PUBLIC] = AccessPermission.NO_PERMISSION
+        self.factory_category_permission[AccessCategory.AUTHENTICATED] = AccessPermission.NO_PERMISSION
+        hidden_posts = PostFactory.create_batch(2)
+        PostCategoryPermissionFactory.create_batch(hidden_posts, category_permission=self.factory_category_permission)
+        # Act
+        response = self.client.get(self.url, {'pagination': 'cursor'})
+        listed_ids = {result['id'] for result in response.data.get('results')}
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(listed_ids, {post.id for post in visible_posts})
+
+class PostCachedCountViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.team = TeamFactory()
+        self.user = CustomUserFactory(team=self.team)
+        self.client.force_authenticate(self.user)
+        self.permissions = PermissionFactory.create_batch()
+        self.categories = CategoryFactory.create_batch()
+        self.factory_category_permission = {
+            AccessCategory.PUBLIC: AccessPermission.READ,
+            AccessCategory.AUTHENTICATED: AccessPermission.READ,
+            AccessCategory.TEAM: AccessPermission.EDIT,
+            AccessCategory.AUTHOR: AccessPermission.EDIT
+        }
+        posts = PostFactory.create_batch(4)
+        PostCategoryPermissionFactory.create_batch(posts, category_permission=self.factory_category_permission)
+        self.url = reverse('post-list-create')
+
+    def test_the_count_is_served_from_the_cache_on_the_second_request(self):
+        # Arrange
+        admin = CustomUserFactory(team=self.team, is_staff=True)
+        self.client.force_authenticate(admin)
+        self.client.get(self.url)
+        # Act
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'page': 1})
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get('count'), 4)
+
+    def test_the_cached_count_is_invalidated_when_a_post_is_created(self):
+        # Arrange
+        self.client.get(self.url)
+        data = {
+            "title": "test title",
+            "content": "This is the content of the Post",
+            "category_permission": create_default_category_permissions_handler(self.categories, self.permissions)
+        }
+        # Act
+        self.client.post(self.url, data, format='json')
+        response = self.client.get(self.url)
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get('count'), 5)
+
+    def test_the_cached_count_is_not_shared_between_users_with_different_visibility(self):
+        # Arrange
+        self.factory_category_permission[AccessCategory.PUBLIC] = AccessPermission.NO_PERMISSION
+        authenticated_posts = PostFactory.create_batch(2)
+        PostCategoryPermissionFactory.create_batch(authenticated_posts, category_permission=self.factory_category_permission)
+        self.client.get(self.url)
+        self.client.logout()
+        # Act
+        response = self.client.get(self.url)
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get('count'), 4)
+
+    @patch('common.paginator.ESTIMATED_COUNT_THRESHOLD', 0)
+    def test_admin_user_listing_every_post_receives_the_table_estimate_as_count(self):
+        # Arrange
+        admin = CustomUserFactory(team=self.team, is_staff=True)
+        self.client.force_authenticate(admin)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE post_post")
+            cursor.execute("SELECT reltuples FROM pg_class WHERE relname = 'post_post'")
+            estimated_count = int(cursor.fetchone()[0])
+        # Act
+        response = self.client.get(self.url)
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get('count'), estimated_count)
+
+class PostAnonymousResponseCacheViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.permissions = PermissionFactory.create_batch()
+        self.categories = CategoryFactory.create_batch()
+        self.factory_category_permission = {
+            AccessCategory.PUBLIC: AccessPermission.READ,
+            AccessCategory.AUTHENTICATED: AccessPermission.READ,
+            AccessCategory.TEAM: AccessPermission.EDIT,
+            AccessCategory.AUTHOR: AccessPermission.EDIT
+        }
+        self.posts = PostFactory.create_batch(3)
+        PostCategoryPermissionFactory.create_batch(self.posts, category_permission=self.factory_category_permission)
+        self.url = reverse('post-list-create')
+
+    def test_unauthenticated_user_receives_the_cached_list_without_queries(self):
+        # Arrange
+        first_response = self.client.get(self.url)
+        # Act
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), first_response.json())
+
+    def test_unauthenticated_user_receives_the_cached_post_details_without_queries(self):
+        # Arrange
+        url = reverse('post-retrieve-update-delete', args=[self.posts[0].id])
+        self.client.get(url)
+        # Act
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json().get('id'), self.posts[0].id)
+
+    def test_the_cached_list_is_served_with_the_headers_of_the_rendered_list(self):
+        # Arrange
+        first_response = self.client.get(self.url)
+        # Act
+        response = self.client.get(self.url)
+        # Assert
+        # Only the timings of the request differ
+        self.assertEqual(
+            {header: value for header, value in response.items() if header != 'Server-Timing'},
+            {header: value for header, value in first_response.items() if header != 'Server-Timing'},
+        )
+        self.assertIn('GET', response['Allow'])
+
+    def test_the_cached_list_is_keyed_by_query_string(self):
+        # Arrange
+        self.client.get(self.url, {'page_size': 1})
+        # Act
+        response = self.client.get(self.url, {'page_size': 2})
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json().get('results')), 2)
+
+    def test_the_cached_list_is_invalidated_when_a_post_loses_its_public_permission(self):
+        # Arrange
+        self.client.get(self.url)
+        no_permission = Permission.objects.get(name=AccessPermission.NO_PERMISSION)
+        post_category_permission = PostCategoryPermission.objects.get(post=self.posts[0], category__name=AccessCategory.PUBLIC)
+        post_category_permission.permission = no_permission
+        # Act
+        post_category_permission.save()
+        response = self.client.get(self.url)
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json().get('count'), 2)
+
+    def test_the_cached_post_details_are_invalidated_when_the_post_is_deleted(self):
+        # Arrange
+        url = reverse('post-retrieve-update-delete', args=[self.posts[0].id])
+        self.client.get(url)
+        # Act
+        self.posts[0].delete()
+        response = self.client.get(url)
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_authenticated_user_does_not_receive_the_anonymous_cached_list(self):
+        # Arrange
+        user = CustomUserFactory()
+        self.client.force_authenticate(user)
+        self.factory_category_permission[AccessCategory.PUBLIC] = AccessPermission.NO_PERMISSION
+        authenticated_post = PostFactory()
+        PostCategoryPermissionFactory(post=authenticated_post, category_permission=self.factory_category_permission)
+        cache.clear()
+        self.client.logout()
+        self.client.get(self.url)
+        self.client.force_authenticate(user)
+        # Act
+        response = self.client.get(self.url)
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get('count'), 4)
+
+    def test_the_cached_list_shows_the_new_counters_when_a_post_is_liked_and_commented(self):
+        # Arrange
+        self.client.get(self.url)
+        user = CustomUserFactory()
+        # Act
+        Like.bulk_set_active(user.id, [self.posts[0].id], True)
+        CommentFactory(user=user, post=self.posts[0])
+        response = self.client.get(self.url)
+        # Assert
+        counters = {post['id']: (post['like_count'], post['comment_count']) for post in response.json().get('results')}
+        self.assertEqual(counters[self.posts[0].id], (1, 1))
+
+    def test_the_cached_post_details_show_the_new_like_count_when_the_post_is_liked(self):
+        # Arrange
+        url = reverse('post-retrieve-update-delete', args=[self.posts[0].id])
+        self.client.get(url)
+        # Act
+        LikeFactory(post=self.posts[0])
+        response = self.client.get(url)
+        # Assert
+        self.assertEqual(response.json().get('like_count'), 1)
+
+
+class PostTeamFeedCacheViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.team = TeamFactory()
+        self.user = CustomUserFactory(team=self.team)
+        self.teammate = CustomUserFactory(team=self.team)
+        self.client.force_authenticate(self.user)
+        self.permissions = PermissionFactory.create_batch()
+        self.categories = CategoryFactory.create_batch()
+        self.no_permission = {category: AccessPermission.NO_PERMISSION for category in CATEGORIES}
+        self.url = reverse('post-list-create')
+
+    def create_post(self, user, **category_permission):
+        post = PostFactory(user=user)
+        PostCategoryPermissionFactory(post=post, category_permission={**self.no_permission, **category_permission})
+        return post
+
+    def list_post_ids(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [result['id'] for result in response.data.get('results')]
+
+    def test_authenticated_user_feed_merges_team_posts_with_their_own_posts_in_order(self):
+        # Arrange
+        public_post = self.create_post(CustomUserFactory(), public=AccessPermission.READ)
+        own_post = self.create_post(self.user, author=AccessPermission.READ)
+        team_post = self.create_post(self.teammate, team=AccessPermission.READ)
+        self.create_post(self.user, public=AccessPermission.READ)
+        self.create_post(CustomUserFactory(), team=AccessPermission.READ)
+        # Act
+        post_ids = self.list_post_ids()
+        # Assert
+        self.assertEqual(post_ids, [team_post.id, own_post.id, public_post.id])
+
+    def test_two_users_of_the_same_team_share_the_team_feed_but_not_their_own_posts(self):
+        # Arrange
+        team_post = self.create_post(self.teammate, team=AccessPermission.READ, author=AccessPermission.READ)
+        own_post = self.create_post(self.user, author=AccessPermission.EDIT)
+        # Act
+        user_post_ids = self.list_post_ids()
+        self.client.force_authenticate(self.teammate)
+        teammate_post_ids = self.list_post_ids()
+        # Assert
+        self.assertEqual(user_post_ids, [own_post.id, team_post.id])
+        self.assertEqual(teammate_post_ids, [team_post.id])
+
+    def test_the_team_feed_is_invalidated_when_a_post_author_changes_of_team(self):
+        # Arrange
+        team_post = self.create_post(self.teammate, team=AccessPermission.READ)
+        self.list_post_ids()
+        # Act
+        self.teammate.team = TeamFactory()
+        self.teammate.save()
+        post_ids = self.list_post_ids()
+        # Assert
+        self.assertNotIn(team_post.id, post_ids)
+
+    def test_a_post_whose_team_access_is_revoked_is_not_listed_from_a_stale_team_feed(self):
+        # Arrange
+        team_post = self.create_post(self.teammate, team=AccessPermission.READ)
+        visible_post_ids = self.list_post_ids()
+        # Act
+        # A queryset update skips the invalidation, as a write the cache of this process did not see
+        Post.objects.filter(id=team_post.id).update(access=0)
+        post_ids = self.list_post_ids()
+        # Assert
+        self.assertEqual(visible_post_ids, [team_post.id])
+        self.assertEqual(post_ids, [])
+
+    @patch('post.feed.TEAM_FEED_CACHE_MAX_POSTS', 1)
+    def test_a_team_feed_too_large_to_be_cached_is_listed_with_the_permission_query(self):
+        # Arrange
+        posts = [self.create_post(CustomUserFactory(), authenticated=AccessPermission.READ) for _ in range(3)]
+        # Act
+        response = self.client.get(self.url)
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get('count'), len(posts))
+
+    @patch('post.feed.TEAM_FEED_CACHE_MAX_POSTS', 1)
+    def test_a_team_feed_too_large_to_be_cached_is_not_read_again_on_the_next_request(self):
+        # Arrange
+        for _ in range(3):
+            self.create_post(CustomUserFactory(), authenticated=AccessPermission.READ)
+        self.client.get(self.url)
+        # Act
+        # Page with author and team, category permissions
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get('count'), 3)
+
+class PostQueryPlanViewTests(QueryPlanTestMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.team = TeamFactory()
+        self.user = CustomUserFactory(team=self.team)
+        self.permissions = PermissionFactory.create_batch()
+        self.categories = CategoryFactory.create_batch()
+        self.factory_category_permission = {
+            AccessCategory.PUBLIC: AccessPermission.READ,
+            AccessCategory.AUTHENTICATED: AccessPermission.READ,
+            AccessCategory.TEAM: AccessPermission.EDIT,
+            AccessCategory.AUTHOR: AccessPermission.EDIT
+        }
+        access = 0
+        for category, permission in self.factory_category_permission.items():
+            access |= get_access_bits(category, permission)
+        # Enough rows for the planner to prefer reading the page from an index over sorting
+        authors = CustomUserFactory.create_batch(10) + [self.user]
+        Post.objects.bulk_create([
+            Post(title=f"Post {index}", content=CONTENT_MOCK, user=authors[index % len(authors)], access=access)
+            for index in range(1000)
+        ])
+        self.url = reverse('post-list-create')
+
+    def test_unauthenticated_user_list_reads_the_page_from_the_created_at_index(self):
+        # Act
+        queries = self.get_request_queries(self.url)
+        # Assert
+        page_query = self.get_query_on(queries, 'post_post', '"post_post"."title"', 'LIMIT')
+        self.assertQueryUsesIndex(page_query, 'post_created_at_id_idx')
+
+    def test_admin_user_list_reads_the_page_from_the_created_at_index(self):
+        # Arrange
+        self.client.force_authenticate(CustomUserFactory(team=self.team, is_staff=True))
+        # Act
+        queries = self.get_request_queries(self.url)
+        # Assert
+        page_query = self.get_query_on(queries, 'post_post', '"post_post"."title"', 'LIMIT')
+        self.assertQueryUsesIndex(page_query, 'post_created_at_id_idx')
+
+    def test_authenticated_user_team_feed_reads_the_posts_from_the_created_at_index(self):
+        # Arrange
+        self.client.force_authenticate(self.user)
+        # Act
+        queries = self.get_request_queries(self.url)
+        # Assert
+        team_feed_query = self.get_query_on(queries, 'post_post', '"user_customuser"."team_id"', 'LIMIT')
+        self.assertQueryUsesIndex(team_feed_query, 'post_created_at_id_idx')
+
+    def test_authenticated_user_own_posts_are_read_from_the_user_index(self):
+        # Arrange
+        self.client.force_authenticate(self.user)
+        # Act
+        queries = self.get_request_queries(self.url)
+        # Assert
+        own_posts_query = self.get_query_on(queries, 'post_post', f'"post_post"."user_id" = {self.user.id} ORDER BY')
+        self.assertQueryUsesIndex(own_posts_query, 'post_post_user_id')
+
+    def test_authenticated_user_cursor_list_reads_the_page_from_the_created_at_index(self):
+        # Arrange
+        self.client.force_authenticate(self.user)
+        # Act
+        queries = self.get_request_queries(self.url, {'pagination': 'cursor'})
+        # Assert
+        page_query = self.get_query_on(queries, 'post_post', '"post_post"."title"', 'LIMIT')
+        self.assertQueryUsesIndex(page_query, 'post_created_at_id_idx')
+
+
+class PostNPlusOneQueryViewTests(NPlusOneQueryTestMixin, APITestCase):
+    def setUp(self):
+        self.team = TeamFactory()
+        self.user = CustomUserFactory(team=self.team)
+        self.permissions = PermissionFactory.create_batch()
+        self.categories = CategoryFactory.create_batch()
+        # Every post has a different author on a different team, with likes and comments
+        posts = PostFactory.create_batch(12) + PostFactory.create_batch(2, user=self.user)
+        PostCategoryPermissionFactory.create_batch(posts, category_permission=DEFAULT_ACCESS_CONTROL)
+        for post in posts:
+            LikeFactory(post=post, user=self.user)
+            CommentFactory(post=post)
+        self.url = reverse('post-list-create')
+
+    def test_unauthenticated_user_list_does_not_query_per_post(self):
+        # Act
+        # Assert
+        self.assertNoNPlusOneQueries(self.url)
+
+    def test_authenticated_user_list_does_not_query_per_post(self):
+        # Arrange
+        self.client.force_authenticate(self.user)
+        # Act
+        # Assert
+        self.assertNoNPlusOneQueries(self.url)
+
+    def test_authenticated_user_cursor_list_does_not_query_per_post(self):
+        # Arrange
+        self.client.force_authenticate(self.user)
+        # Act
+        # Assert
+        self.assertNoNPlusOneQueries(self.url, {'pagination': 'cursor'})
+
+    def test_admin_user_list_does_not_query_per_post(self):
+        # Arrange
+        self.client.force_authenticate(CustomUserFactory(team=self.team, is_staff=True))
+        # Act
+        # Assert
+        self.assertNoNPlusOneQueries(self.url)
+
+class PostBulkCreateViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.team = TeamFactory()
+        self.user = CustomUserFactory(team=self.team)
+        self.client.force_authenticate(self.user)
+        self.url = reverse('post-bulk-create')
+        self.permissions = PermissionFactory.create_batch()
+        self.categories = CategoryFactory.create_batch()
+        self.category_permission = create_default_category_permissions_handler(self.categories, self.permissions)
+        self.data = [
+            {"title": f"test title {index}", "content": CONTENT_MOCK, "category_permission": self.category_permission}
+            for index in range(5)
+        ]
+
+    def test_authenticated_user_can_create_posts_in_bulk_and_their_ids_are_returned(self):
+        # Act
+        response = self.client.post(self.url, self.data, format='json')
+        # Assert
+        ids = response.data.get('ids')
+        posts = Post.objects.filter(id__in=ids)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(ids), len(self.data))
+        self.assertEqual(posts.filter(user=self.user).count(), len(self.data))
+        self.assertEqual(PostCategoryPermission.objects.filter(post__in=ids).count(), len(self.data) * len(self.category_permission))
+
+    def test_posts_created_in_bulk_have_the_same_excerpt_and_access_as_a_single_post(self):
+        # Arrange
+        single_response = self.client.post(reverse('post-list-create'), self.data[0], format='json')
+        single_post = Post.objects.get(id=single_response.data.get('id'))
+        # Act
+        response = self.client.post(self.url, self.data, format='json')
+        # Assert
+        for post in Post.objects.filter(id__in=response.data.get('ids')):
+            self.assertEqual(post.excerpt, single_post.excerpt)
+            self.assertEqual(post.access, single_post.access)
+
+    def test_posts_are_created_in_bulk_with_one_insert_per_table(self):
+        # Act
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, self.data, format='json')
+        # Assert
+        inserts = [query['sql'] for query in context.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(inserts), 2)
+
+    def test_an_invalid_post_rejects_the_whole_batch_and_400_is_returned(self):
+        # Arrange
+        current_posts = Post.objects.count()
+        self.data[3]["category_permission"] = self.category_permission[:2]
+        # Act
+        response = self.client.post(self.url, self.data, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('non_field_errors', response.data[3])
+        self.assertEqual(Post.objects.count(), current_posts)
+
+    def test_a_post_with_a_repeated_category_rejects_the_whole_batch_and_400_is_returned(self):
+        # Arrange
+        current_posts = Post.objects.count()
+        self.data[1]["category_permission"] = [self.category_permission[0]] * len(self.category_permission)
+        # Act
+        response = self.client.post(self.url, self.data, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('non_field_errors', response.data[1])
+        self.assertEqual(Post.objects.count(), current_posts)
+
+    def test_an_empty_batch_can_not_be_created_and_400_is_returned(self):
+        # Act
+        response = self.client.post(self.url, [], format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch('post.serializers.BULK_CREATE_MAX_POSTS', 4)
+    def test_a_batch_larger_than_the_limit_can_not_be_created_and_400_is_returned(self):
+        # Act
+        response = self.client.post(self.url, self.data, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Post.objects.count(), 0)
+
+    def test_posts_created_in_bulk_are_listed_right_away(self):
+        # Arrange
+        self.client.get(reverse('post-list-create'))
+        # Act
+        self.client.post(self.url, self.data, format='json')
+        response = self.client.get(reverse('post-list-create'))
+        # Assert
+        self.assertEqual(response.data.get('count'), len(self.data))
+
+    def test_an_unauthenticated_user_can_not_create_posts_in_bulk_and_403_is_returned(self):
+        # Arrange
+        self.client.force_authenticate(None)
+        # Act
+        response = self.client.post(self.url, self.data, format='json')
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Post.objects.count(), 0)
+
+
+class PostExportViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.team = TeamFactory()
+        self.user = CustomUserFactory(team=self.team)
+        self.url = reverse('post-export')
+        self.permissions = PermissionFactory.create_batch()
+        self.categories = CategoryFactory.create_batch()
+        private_access = {**DEFAULT_ACCESS_CONTROL, AccessCategory.PUBLIC: AccessPermission.NO_PERMISSION}
+        team_access = {**private_access, AccessCategory.AUTHENTICATED: AccessPermission.NO_PERMISSION}
+        # Public posts, posts for authenticated users, and team posts of the user team and of other teams
+        public_posts = PostFactory.create_batch(3)
+        authenticated_posts = PostFactory.create_batch(2)
+        team_posts = PostFactory.create_batch(2, user=CustomUserFactory(team=self.team)) + PostFactory.create_batch(2)
+        PostCategoryPermissionFactory.create_batch(public_posts, category_permission=DEFAULT_ACCESS_CONTROL)
+        PostCategoryPermissionFactory.create_batch(authenticated_posts, category_permission=private_access)
+        PostCategoryPermissionFactory.create_batch(team_posts, category_permission=team_access)
+
+    def get_exported_posts(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def get_listed_post_ids(self):
+        response = self.client.get(reverse('post-list-create'), {'page_size': 50})
+        return [post['id'] for post in response.data.get('results')]
+
+    def test_unauthenticated_user_exports_the_public_posts(self):
+        # Act
+        posts = self.get_exported_posts()
+        # Assert
+        self.assertEqual(len(posts), 3)
+        self.assertCountEqual([post['id'] for post in posts], self.get_listed_post_ids())
+
+    def test_authenticated_user_exports_the_same_posts_as_the_list(self):
+        # Arrange
+        self.client.force_authenticate(self.user)
+        # Act
+        posts = self.get_exported_posts()
+        # Assert
+        self.assertEqual(len(posts), 7)
+        self.assertCountEqual([post['id'] for post in posts], self.get_listed_post_ids())
+        self.assertEqual(len(posts[0]['category_permission']), len(CATEGORIES))
+        self.assertNotIn('content', posts[0])
+
+    def test_admin_user_exports_every_post(self):
+        # Arrange
+        self.client.force_authenticate(CustomUserFactory(is_staff=True))
+        # Act
+        posts = self.get_exported_posts()
+        # Assert
+        self.assertEqual(len(posts), Post.objects.count())
+
+    def test_export_reads_the_posts_in_chunks_with_a_query_per_chunk(self):
+        # Arrange
+        self.client.force_authenticate(self.user)
+        # Act
+        # Posts, and the category permissions of each chunk of 2 posts
+        with patch('post.views.EXPORT_CHUNK_SIZE', 2), self.assertNumQueries(5):
+            posts = self.get_exported_posts()
+        # Assert
+        self.assertEqual(len(posts), 7)
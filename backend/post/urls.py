@@ -3,6 +3,8 @@ from . import views
 
 urlpatterns = [
     path('', views.ListCreatePostView.as_view(), name="post-list-create"),
+    path('bulk/', views.BulkCreatePostView.as_view(), name="post-bulk-create"),
+    path('export/', views.ExportPostView.as_view(), name="post-export"),
     path('<int:pk>/', views.RetrieveUpdateDeletePostView.as_view(), name="post-retrieve-update-delete"),
 ]
 
@@ -1,38 +1,116 @@
-from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
+import json
+from rest_framework import status
+from rest_framework.generics import GenericAPIView, ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated, AllowAny
 from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from django.contrib.auth.models import AnonymousUser
 from django.core.exceptions import PermissionDenied
-from django.db.models import Q
-from post.models import Post
-from post.serializers import PostListCreateSerializer, PostRetrieveUpdateDestroySerializer
-from common.constants import DEFAULT_ACCESS_CONTROL
-from common.mixins import GetQuerysetByPermissionsMixin
-from common.paginator import TenResultsSetPagination
+from django.db.models import Q, Prefetch, Exists, OuterRef, Value
+from django.http import StreamingHttpResponse
+from post.models import Post, PostCategoryPermission
+from post.feed import get_user_feed_post_ids
+from like.models import Like
+from post.serializers import PostBulkCreateSerializer, PostListCreateSerializer, PostRetrieveUpdateDestroySerializer
+from common.constants import DEFAULT_ACCESS_CONTROL, EXPORT_CHUNK_SIZE, CacheNamespace
+from common.mixins import AnonymousResponseCacheMixin, CursorPaginationMixin, GetQuerysetByPermissionsMixin
+from common.paginator import TenResultsSetCachedCountPagination, TenResultsSetCursorPagination
 
 
-class ListCreatePostView(ListCreateAPIView, GetQuerysetByPermissionsMixin):
+def load_post_relations(queryset):
+    # Join the author and their team, and prefetch the category permissions as raw ids,
+    # so a page of posts costs a constant number of queries
+    category_permissions = PostCategoryPermission.objects.only('post', 'category', 'permission')
+    return queryset.select_related('user__team').prefetch_related(
+        Prefetch('post_category_permission', queryset=category_permissions)
+    )
+
+def annotate_liked_by_me(queryset, user):
+    # Flag the posts liked by the user in the same query that loads the page
+    if user.is_anonymous:
+        return queryset.annotate(liked_by_me=Value(False))
+    active_likes = Like.objects.filter(post=OuterRef('pk'), user=user.id, is_active=True)
+    return queryset.annotate(liked_by_me=Exists(active_likes))
+
+class ListCreatePostView(AnonymousResponseCacheMixin, CursorPaginationMixin, ListCreateAPIView, GetQuerysetByPermissionsMixin):
 
     permission_classes = [IsAuthenticatedOrReadOnly]
-    pagination_class = TenResultsSetPagination
+    pagination_class = TenResultsSetCachedCountPagination
+    cursor_pagination_class = TenResultsSetCursorPagination
+    # The posts show their like and comment counters
+    cache_namespaces = (CacheNamespace.POST, CacheNamespace.LIKE, CacheNamespace.COMMENT)
     serializer_class = PostListCreateSerializer
 
     # Set the user field in the serializer to the user making the request
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        # Authenticated users read the cached feed of their team merged with their own posts
+        post_ids = self.get_feed_post_ids()
+        if post_ids is None:
+            return super().list(request, *args, **kwargs)
+        page_ids = self.paginate_queryset(post_ids)
+        # The page keeps the permission conditions, so a stale feed can hide posts but never expose them
+        posts = self.get_queryset().filter(id__in=page_ids).in_bulk()
+        serializer = self.get_serializer([posts[post_id] for post_id in page_ids if post_id in posts], many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def get_feed_post_ids(self):
+        user = self.request.user
+        if user.is_anonymous or user.is_staff or isinstance(self.paginator, CursorPagination):
+            return None
+        return get_user_feed_post_ids(user)
+
     def get_queryset(self): 
-        return self.get_queryset_by_permissions(Post, is_post_related=False)
+        queryset = self.get_queryset_by_permissions(Post, is_post_related=False)
+        queryset = annotate_liked_by_me(queryset, self.request.user)
+        return load_post_relations(queryset)
         
 
-class RetrieveUpdateDeletePostView(RetrieveUpdateDestroyAPIView, GetQuerysetByPermissionsMixin):
+class RetrieveUpdateDeletePostView(AnonymousResponseCacheMixin, RetrieveUpdateDestroyAPIView, GetQuerysetByPermissionsMixin):
 
     permission_classes = [AllowAny]
     serializer_class = PostRetrieveUpdateDestroySerializer
+    # The posts show their like and comment counters
+    cache_namespaces = (CacheNamespace.POST, CacheNamespace.LIKE, CacheNamespace.COMMENT)
             
     def get_queryset(self): 
-        return self.get_queryset_by_permissions(Post)
+        queryset = self.get_queryset_by_permissions(Post)
+        queryset = annotate_liked_by_me(queryset, self.request.user)
+        return load_post_relations(queryset)
+
+
+class BulkCreatePostView(GenericAPIView):
 
+    permission_classes = [IsAuthenticated]
+    serializer_class = PostBulkCreateSerializer
 
+    def post(self, request):
+        # Every post is validated before any of them is written, an invalid post rejects the whole batch
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        posts = serializer.save(user=request.user)
+        return Response({'ids': [post.id for post in posts]}, status=status.HTTP_201_CREATED)
+
+
+class ExportPostView(GenericAPIView, GetQuerysetByPermissionsMixin):
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    serializer_class = PostListCreateSerializer
 
+    def get(self, request):
+        # The posts are read with a server-side cursor and written one line at a time, so the
+        # memory used does not depend on how many posts the user can read
+        posts = self.get_queryset().order_by('-created_at', '-id').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        serializer = self.get_serializer()
+        lines = (json.dumps(serializer.to_representation(post), cls=JSONEncoder) + "\n" for post in posts)
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
 
+    def get_queryset(self):
+        # Same visibility as the post list, the category permissions are prefetched per chunk
+        queryset = self.get_queryset_by_permissions(Post)
+        queryset = annotate_liked_by_me(queryset, self.request.user)
+        return load_post_relations(queryset)
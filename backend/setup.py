@@ -3,6 +3,7 @@ from permission.tests.factories import PermissionFactory
 from category.tests.factories import CategoryFactory
 from team.tests.factories import TeamFactory
 from team.constants import DEFAULT_TEAM_NAME
+from team.models import Team
 from user.models import CustomUser
 from user.tests.factories import CustomUserFactory
 from post.tests.factories import PostFactory, PostCategoryPermissionFactory
@@ -171,5 +172,7 @@ def fill_database():
     print("Database filled.")
 
 
-fill_database()
+# The init step runs on every deploy, the sample data is created only once
+if not Team.objects.filter(name=DEFAULT_TEAM_NAME).exists():
+    fill_database()
 check_and_create_superuser()
\ No newline at end of file
@@ -0,0 +1,63 @@
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from common.cache import get_cache_version, invalidate_cache
+from common.constants import USER_CACHE_FIELDS, USER_CACHE_TIMEOUT, CacheNamespace
+from team.models import Team
+from user.models import CustomUser
+
+
+def _get_user_cache_key(user_id):
+    return f"auth-user:{get_cache_version(CacheNamespace.USER)}:{user_id}"
+
+def _get_field_values(instance, field_names):
+    return {name: getattr(instance, name) for name in field_names}
+
+def _from_field_values(model, db, field_values):
+    # from_db expects the values in the order of the concrete fields and defers the missing ones
+    field_names = [field.attname for field in model._meta.concrete_fields if field.attname in field_values]
+    return model.from_db(db, field_names, [field_values[name] for name in field_names])
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    Authentication backend that caches the user of the session together with its team.
+
+    The session middleware loads the user of every authenticated request, the cache saves that
+    query and the team is loaded with it, so the views and permission checks reading `request.user`
+    do not fetch it again. Only the fields in USER_CACHE_FIELDS and the session hash are cached,
+    the user is rebuilt with its password deferred, so the password hash never reaches the cache
+    and saving the user does not write it back.
+
+    The entry is deleted when the user is saved, which also covers the last login, and every entry
+    expires when a team changes or a user changes its password or active status.
+    """
+
+    def get_user(self, user_id):
+        cache_key = _get_user_cache_key(user_id)
+        cached = cache.get(cache_key)
+        if cached is None:
+            user = CustomUser._default_manager.select_related('team').filter(pk=user_id).first()
+            if user is None:
+                return None
+            cache.set(cache_key, {
+                'db': user._state.db,
+                'user': _get_field_values(user, USER_CACHE_FIELDS),
+                'team': _get_field_values(user.team, [field.attname for field in Team._meta.concrete_fields]),
+                'session_auth_hash': user.get_session_auth_hash(),
+            }, USER_CACHE_TIMEOUT)
+        else:
+            user = _from_field_values(CustomUser, cached['db'], cached['user'])
+            user.team = _from_field_values(Team, cached['db'], cached['team'])
+            user._cached_session_auth_hash = cached['session_auth_hash']
+        return user if self.user_can_authenticate(user) else None
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def delete_cached_user(sender, instance, **kwargs):
+    cache.delete(_get_user_cache_key(instance.id))
+
+@receiver([post_save, post_delete], sender=Team)
+def invalidate_cached_users(sender, **kwargs):
+    invalidate_cache(CacheNamespace.USER)
@@ -0,0 +1,51 @@
+import time
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the expired sessions in small batches along the expire date index, pausing between "
+        "batches. Unlike clearsessions it never holds long locks and an interrupted run is resumed by "
+        "the next one, which starts again from the oldest session."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Sessions deleted per statement")
+        parser.add_argument('--sleep', type=float, default=0.1, help="Seconds to pause between batches")
+        parser.add_argument('--max-batches', type=int, help="Stop after this many batches, the next run resumes")
+        parser.add_argument('--loop', action='store_true', help="Keep running and purge every interval")
+        parser.add_argument('--interval', type=float, default=3600, help="Seconds between purges with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            self.purge(options['batch_size'], options['sleep'], options['max_batches'])
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def purge(self, batch_size, sleep, max_batches):
+        # Sessions expiring while the purge runs are left for the next one
+        cutoff = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=cutoff).order_by('expire_date').values('session_key')
+        start = time.perf_counter()
+        deleted = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            # Sessions have no relations, so this is a single DELETE with the batch as a subquery
+            batch_deleted, _ = Session.objects.filter(session_key__in=expired[:batch_size]).delete()
+            if not batch_deleted:
+                break
+            deleted += batch_deleted
+            batches += 1
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"-- Batch {batches}: {deleted} sessions deleted, {deleted / elapsed:.0f} sessions/s")
+            if batch_deleted < batch_size:
+                break
+            time.sleep(sleep)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} expired sessions in {batches} batches and {elapsed:.2f} s"
+        ))
+        return deleted
@@ -4,6 +4,8 @@ from django.utils.translation import gettext_lazy as _
 from team.models import Team
 from team.constants import DEFAULT_TEAM_NAME
 from django.core.exceptions import ObjectDoesNotExist
+from common.cache import invalidate_cache
+from common.constants import CacheNamespace
 
 
 class CustomUserManager(BaseUserManager):
@@ -67,6 +69,48 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._team_id_in_db = instance.__dict__.get('team_id')
+        instance._is_active_in_db = instance.__dict__.get('is_active')
+        return instance
+
+    def set_password(self, raw_password):
+        super().set_password(raw_password)
+        self._password_changed = True
+
+    def get_session_auth_hash(self):
+        # The users read from the cache of CachedModelBackend have their password deferred and
+        # carry the hash computed when they were cached
+        cached_hash = getattr(self, '_cached_session_auth_hash', None)
+        if cached_hash is not None and 'password' in self.get_deferred_fields():
+            return cached_hash
+        return super().get_session_auth_hash()
+
+    def save(self, *args, **kwargs):
+        team_changed = not self._state.adding and getattr(self, '_team_id_in_db', self.team_id) != self.team_id
+        credentials_changed = not self._state.adding and (
+            getattr(self, '_password_changed', False)
+            or getattr(self, '_is_active_in_db', None) != self.__dict__.get('is_active')
+        )
+        super().save(*args, **kwargs)
+        self._team_id_in_db = self.team_id
+        self._is_active_in_db = self.__dict__.get('is_active')
+        self._password_changed = False
+        # The team feeds depend on the team of every author
+        if team_changed:
+            invalidate_cache(CacheNamespace.TEAM)
+        # The cached session users would keep a revoked session alive until they expire
+        if credentials_changed:
+            invalidate_cache(CacheNamespace.USER)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        # The posts of the user are deleted in cascade without calling Post.delete
+        invalidate_cache(CacheNamespace.POST)
+        return result
     
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
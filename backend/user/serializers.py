@@ -29,7 +29,7 @@ class CustomUserLoginSerializer(serializers.Serializer):
     user_id = serializers.IntegerField(read_only=True, source='user.id')
     first_name = serializers.CharField(read_only=True, source='user.first_name')
     last_name = serializers.CharField(read_only=True, source='user.last_name')
-    team_id = serializers.IntegerField(read_only=True, source='user.team.id')
+    team_id = serializers.IntegerField(read_only=True, source='user.team_id')
     is_admin = serializers.BooleanField(read_only=True, source='user.is_staff')
 
     def validate(self, data):
@@ -0,0 +1,141 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+from team.constants import DEFAULT_TEAM_NAME
+from team.tests.factories import TeamFactory
+from common.cache import get_cache_version
+from common.constants import CacheNamespace
+from user.backends import CachedModelBackend, _get_user_cache_key
+from user.models import CustomUser
+from user.tests.factories import CustomUserFactory
+
+
+class CachedModelBackendTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.backend = CachedModelBackend()
+        self.team = TeamFactory(name=DEFAULT_TEAM_NAME)
+        self.raw_password = "TestPassword&123"
+        self.user = CustomUserFactory(team=self.team, password=self.raw_password)
+
+    def test_the_user_is_loaded_with_its_team_and_then_read_from_the_cache(self):
+        # Act
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.id)
+        with self.assertNumQueries(0):
+            user = self.backend.get_user(self.user.id)
+            team_name = user.team.name
+        # Assert
+        self.assertEqual(user, self.user)
+        self.assertEqual(team_name, DEFAULT_TEAM_NAME)
+
+    def test_the_cached_user_is_deleted_when_the_user_changes_of_team(self):
+        # Arrange
+        other_team = TeamFactory(name="Other Team")
+        self.backend.get_user(self.user.id)
+        # Act
+        self.user.team = other_team
+        self.user.save()
+        user = self.backend.get_user(self.user.id)
+        # Assert
+        self.assertEqual(user.team_id, other_team.id)
+
+    def test_the_cached_users_expire_when_their_team_changes(self):
+        # Arrange
+        self.backend.get_user(self.user.id)
+        # Act
+        self.team.name = "Renamed Team"
+        self.team.save()
+        user = self.backend.get_user(self.user.id)
+        # Assert
+        self.assertEqual(user.team.name, "Renamed Team")
+
+    def test_an_inactive_user_is_not_returned(self):
+        # Arrange
+        self.backend.get_user(self.user.id)
+        self.user.is_active = False
+        self.user.save()
+        # Act
+        user = self.backend.get_user(self.user.id)
+        # Assert
+        self.assertIsNone(user)
+
+    def test_the_password_hash_is_not_cached(self):
+        # Act
+        self.backend.get_user(self.user.id)
+        cached = cache.get(_get_user_cache_key(self.user.id))
+        # Assert
+        self.assertNotIn('password', cached['user'])
+        self.assertNotIn(self.user.password, repr(cached))
+
+    def test_saving_a_cached_user_keeps_its_password(self):
+        # Arrange
+        self.backend.get_user(self.user.id)
+        user = self.backend.get_user(self.user.id)
+        # Act
+        user.first_name = "Renamed"
+        user.save()
+        # Assert
+        saved_user = CustomUser.objects.get(id=self.user.id)
+        self.assertIn('password', user.get_deferred_fields())
+        self.assertEqual(saved_user.first_name, "Renamed")
+        self.assertTrue(saved_user.check_password(self.raw_password))
+
+    def test_the_cached_users_expire_when_a_user_changes_its_password(self):
+        # Arrange
+        version = get_cache_version(CacheNamespace.USER)
+        # Act
+        self.user.set_password("OtherPassword&123")
+        self.user.save()
+        # Assert
+        self.assertNotEqual(get_cache_version(CacheNamespace.USER), version)
+
+    def test_the_cached_users_expire_when_a_user_is_deactivated(self):
+        # Arrange
+        user = CustomUser.objects.get(id=self.user.id)
+        version = get_cache_version(CacheNamespace.USER)
+        # Act
+        user.is_active = False
+        user.save()
+        # Assert
+        self.assertNotEqual(get_cache_version(CacheNamespace.USER), version)
+
+    def test_the_cached_users_do_not_expire_when_a_user_changes_its_name(self):
+        # Arrange
+        user = CustomUser.objects.get(id=self.user.id)
+        version = get_cache_version(CacheNamespace.USER)
+        # Act
+        user.first_name = "Renamed"
+        user.save()
+        # Assert
+        self.assertEqual(get_cache_version(CacheNamespace.USER), version)
+
+    def test_an_authenticated_request_does_not_query_the_session_and_the_user(self):
+        # Arrange
+        self.client.post(reverse('login'), {'email': self.user.email, 'password': self.raw_password})
+        url = reverse('post-list-create')
+        self.client.get(url)
+        # Act
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        # Assert
+        queries = [query['sql'] for query in context.captured_queries]
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([sql for sql in queries if '"django_session"' in sql])
+        self.assertFalse([sql for sql in queries if 'FROM "user_customuser" WHERE' in sql])
+
+    def test_a_password_change_ends_the_sessions_of_the_user(self):
+        # Arrange
+        self.client.post(reverse('login'), {'email': self.user.email, 'password': self.raw_password})
+        response_before = self.client.get(reverse('like-list-create'))
+        # Act
+        self.user.set_password("OtherPassword&123")
+        self.user.save()
+        response = self.client.get(reverse('like-list-create'))
+        # Assert
+        self.assertTrue(response_before.wsgi_request.user.is_authenticated)
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
@@ -0,0 +1,42 @@
+from datetime import timedelta
+from io import StringIO
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+
+class PurgeSessionsCommandTests(TestCase):
+
+    def create_sessions(self, amount, expire_date):
+        sessions = []
+        for _ in range(amount):
+            session = SessionStore()
+            session.create()
+            sessions.append(session.session_key)
+        Session.objects.filter(session_key__in=sessions).update(expire_date=expire_date)
+        return sessions
+
+    def test_purge_sessions_deletes_the_expired_sessions_in_batches(self):
+        # Arrange
+        self.create_sessions(5, timezone.now() - timedelta(days=1))
+        active_sessions = self.create_sessions(2, timezone.now() + timedelta(days=1))
+        output = StringIO()
+        # Act
+        call_command('purge_sessions', batch_size=2, sleep=0, stdout=output)
+        # Assert
+        self.assertCountEqual(Session.objects.values_list('session_key', flat=True), active_sessions)
+        self.assertIn("Deleted 5 expired sessions in 3 batches", output.getvalue())
+
+    def test_an_interrupted_purge_is_resumed_from_the_oldest_session(self):
+        # Arrange
+        oldest_sessions = self.create_sessions(2, timezone.now() - timedelta(days=2))
+        newest_sessions = self.create_sessions(2, timezone.now() - timedelta(days=1))
+        # Act
+        call_command('purge_sessions', batch_size=2, sleep=0, max_batches=1, stdout=StringIO())
+        remaining_sessions = list(Session.objects.values_list('session_key', flat=True))
+        call_command('purge_sessions', batch_size=2, sleep=0, stdout=StringIO())
+        # Assert
+        self.assertCountEqual(remaining_sessions, newest_sessions)
+        self.assertFalse(Session.objects.filter(session_key__in=oldest_sessions + newest_sessions).exists())